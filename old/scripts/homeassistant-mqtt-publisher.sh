@@ -6,6 +6,5 @@ _number_of_times="${1:-0}"
 #export MQTTUI_USERNAME="homeassistant"
 #export MQTTUI_PASSWORD="your hass mqtt password here"
 
-UNIT_SERIAL="$(python -m r3pcomms --serial /dev/ttyACM0 | jq -r '.["Serial Num"]["value"]')"
-sleep 1
-python -m r3pcomms -n "${_number_of_times}" --hid --serial /dev/ttyACM0 | xargs -d'\n' -L1 mqttui publish "r3pcomms/${UNIT_SERIAL}"
+# publishes to r3pcomms/<serial number> over one persistent connection
+python -m r3pcomms -n "${_number_of_times}" --hid --serial /dev/ttyACM0 --mqtt "${MQTTUI_BROKER:-mqtt://localhost:1883}"
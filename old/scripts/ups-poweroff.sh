@@ -5,29 +5,13 @@ _forever="${1}"
 _shutdown_soc_threshold=10
 _forever_check_period=60
 
-
-do_check () {
-  local _soc=$(python -m r3pcomms --hid | jq '.["Charge Level"]["value"]')
-  if test "${_soc}" -eq "${_soc}"; then
-    if test "${_soc}" -le "${_shutdown_soc_threshold}"; then
-      echo "poweroff becuase ${_soc}% <= ${_shutdown_soc_threshold}%" | systemd-cat
-      poweroff
-      return $?
-    else
-      return 0
-    fi
-  else
-    echo "WARNING: \"${_soc}\" is not a number"
-    return -1
-  fi
-}
-
+# one long running process keeps the HID device open and only reads the
+# charge level and AC flag; without AC input it checks every 5s instead
 if test "${_forever}" == "forever"; then
-  while :; do
-    do_check
-    sleep "${_forever_check_period}"
-  done
+  _number=0
 else
-  do_check
-  exit $?
+  _number=1
 fi
+exec python -m r3pcomms --hid -n "${_number}" -e "${_forever_check_period}" \
+  --watchdog "${_shutdown_soc_threshold}" \
+  --watchdog-action 'echo "poweroff because ${R3P_CHARGE_LEVEL}% is low" | systemd-cat; poweroff'
@@ -2,16 +2,88 @@
 River 3 Plus comms from scratch via USB CDC (ACM)
 """
 
-from ._r3pcomms import R3PComms
+import importlib
+
 from ._version import version
 
 __version__ = version
 
+# name -> the module it lives in. imported on first use (PEP 562) so that
+# eg. the CLI's --help or a plain HID poll never loads asyncio, pyserial or
+# the MQTT client
+_LAZY = {
+    "R3PComms": "._r3pcomms",
+    "AsyncR3PComms": "._async",
+    "Batch": "._batch",
+    "decode_batch": "._batch",
+    "CRC16": "._crc",
+    "crc16": "._crc",
+    "crc16_many": "._crc",
+    "DeltaEncoder": "._delta",
+    "rebuild": "._delta",
+    "Emulator": "._emulator",
+    "EnergyMeter": "._energy",
+    "Framer": "._framer",
+    "discover": "._multi",
+    "poll_many": "._multi",
+    "MQTTPublisher": "._mqtt",
+    "Exporter": "._prometheus",
+    "Encoder": "._output",
+    "read_binary": "._output",
+    "Recorder": "._record",
+    "read_records": "._record",
+    "replay": "._replay",
+    "parse_descriptor": "._reportdesc",
+    "Watchdog": "._watchdog",
+    "Sample": "._sample",
+    "as_dicts": "._sample",
+    "SegmentDecoder": "._segments",
+    "register_segment": "._segments",
+    "Ring": "._store",
+    "Store": "._store",
+}
+
 __all__ = [
     "R3PComms",
+    "AsyncR3PComms",
+    "Batch",
+    "decode_batch",
+    "CRC16",
+    "crc16",
+    "crc16_many",
+    "DeltaEncoder",
+    "rebuild",
+    "Emulator",
+    "EnergyMeter",
+    "Framer",
+    "discover",
+    "poll_many",
+    "MQTTPublisher",
+    "Exporter",
+    "Encoder",
+    "read_binary",
+    "Recorder",
+    "read_records",
+    "replay",
+    "parse_descriptor",
+    "Watchdog",
+    "Sample",
+    "as_dicts",
+    "SegmentDecoder",
+    "register_segment",
+    "Ring",
+    "Store",
     "__version__",
 ]
 
 
+def __getattr__(name: str):
+    if name not in _LAZY:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_LAZY[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
 def __dir__() -> list[str]:
     return __all__
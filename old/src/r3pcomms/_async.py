@@ -0,0 +1,353 @@
+#!/usr/bin/env python3
+
+import asyncio
+import time
+from collections.abc import AsyncIterator
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING
+
+from ._r3pcomms import R3PComms
+from ._sample import Sample
+from ._schedule import Scheduler
+from ._timing import Timings
+
+if TYPE_CHECKING:
+    import serial
+
+
+class AsyncR3PComms:
+    """
+    River 3 Plus comms for asyncio
+
+    The CDC (ACM) port is driven non-blocking from the event loop with
+    loop.add_reader (so POSIX only). HID feature reports have no readiness to
+    wait on, so they go through a single worker thread. Framing, decoding and
+    sequence numbering are shared with a plain R3PComms held in proto.
+    """
+
+    proto: R3PComms
+    s: "serial.Serial | None"
+    timeout: float
+    hid_executor: ThreadPoolExecutor | None
+
+    def __init__(
+        self,
+        comport: str = "",
+        hiddev: str = "",
+        debug: int = 0,
+        timeout: float = 1.0,
+        hid_backend: str = "auto",
+    ) -> None:
+        self.proto = R3PComms("", hiddev, debug, hid_backend)
+        self.timeout = timeout
+        self.hid_executor = None
+
+        if comport:
+            import serial
+
+            comport = R3PComms.resolve_comport(comport)
+            comms_args = {
+                "port": None,
+                "baudrate": 115200,
+                "bytesize": serial.EIGHTBITS,
+                "parity": serial.PARITY_NONE,
+                "stopbits": serial.STOPBITS_ONE,
+            }
+            self.s = serial.Serial(**comms_args)
+            self.s.port = comport
+            self.s.timeout = 0
+        else:
+            self.s = None
+
+    @property
+    def redact_sn(self) -> bool:
+        return self.proto.redact_sn
+
+    @redact_sn.setter
+    def redact_sn(self, value: bool) -> None:
+        self.proto.redact_sn = value
+
+    @property
+    def serial_number(self) -> bytes:
+        return self.proto.serial_number
+
+    async def __aenter__(self):
+        if self.s:
+            self.proto.sequence_num = 0
+            self.proto.framer.reset()
+            self.proto.pending = {}
+            self.proto.replies = {}
+            self.proto.lost = {}
+            self.s.open()
+        if self.proto.h:
+            self.hid_executor = ThreadPoolExecutor(max_workers=1)
+        self.proto.__enter__()
+        return self
+
+    async def __aexit__(self, type, value, traceback):
+        if self.hid_executor:
+            self.hid_executor.shutdown(wait=True)
+            self.hid_executor = None
+        self.proto.__exit__(type, value, traceback)
+        if self.s:
+            self.s.close()
+
+    async def readable(self, timeout: float) -> bool:
+        """
+        wait up to timeout seconds for the serial port to have data
+        """
+        loop = asyncio.get_running_loop()
+        fd = self.s.fileno()
+        ready = loop.create_future()
+        loop.add_reader(fd, lambda: ready.done() or ready.set_result(True))
+        try:
+            await asyncio.wait_for(ready, timeout)
+            ret = True
+        except asyncio.TimeoutError:
+            ret = False
+        finally:
+            loop.remove_reader(fd)
+        return ret
+
+    async def tx(self, msg: str) -> int | None:
+        if self.s:
+            frame = self.proto.frame(msg)
+            timings = self.proto.timings
+            if timings:
+                t0 = time.monotonic_ns()
+                ret = self.s.write(frame)
+                timings.add("tx", time.monotonic_ns() - t0)
+                timings.count("tx_bytes", len(frame))
+            else:
+                ret = self.s.write(frame)
+        else:
+            ret = None
+        return ret
+
+    async def rx(self, timeout: float | None = None) -> bytes | None:
+        """
+        next CRC-valid frame (minus its CRC), None on timeout
+        """
+        ret = None
+        if self.s:
+            loop = asyncio.get_running_loop()
+            if timeout is None:
+                timeout = self.timeout
+            deadline = loop.time() + timeout
+            timings = self.proto.timings
+            if timings:
+                t0 = time.monotonic_ns()
+            while (ret := self.proto.next_frame()) is None:
+                remaining = deadline - loop.time()
+                if remaining <= 0 or not await self.readable(remaining):
+                    break
+                chunk = self.s.read(self.s.in_waiting or 1)
+                if timings:
+                    timings.count("rx_bytes", len(chunk))
+                self.proto.framer.feed(chunk)
+            if timings:
+                timings.add("rx", time.monotonic_ns() - t0)
+                if ret is None:
+                    timings.count("timeouts")
+        return ret
+
+    async def query(self, msg: str, timeout: float | None = None) -> bytes:
+        return await self.receive(await self.send(msg, timeout))
+
+    async def send(self, msg: str, timeout: float | None = None) -> int:
+        """
+        see R3PComms.send. the reply is given up on after timeout seconds
+        """
+        proto = self.proto
+        while len(proto.pending) >= proto.depth:
+            await self.route()
+        if timeout is None:
+            timeout = self.timeout
+        seq = proto.sequence_num
+        await self.tx(msg)
+        proto.pending[seq] = (time.monotonic() + timeout, timeout, msg)
+        return seq
+
+    async def receive(self, seq: int) -> bytes:
+        """
+        see R3PComms.receive
+        """
+        proto = self.proto
+        while seq not in proto.replies:
+            if seq not in proto.pending:
+                raise KeyError(seq)
+            await self.route()
+        if (reply := proto.replies.pop(seq)[1]) is None:
+            raise ValueError(f"Failure getting response to {proto.lost.pop(seq)}")
+        return reply
+
+    async def route(self) -> None:
+        """
+        see R3PComms.route. waits no longer than the first pending deadline
+        """
+        proto = self.proto
+        deadline = min((d for (d, _, _) in proto.pending.values()), default=0.0)
+        frame = await self.rx(max(deadline - time.monotonic(), 0.0))
+        proto.file_reply(frame)
+
+    async def read_raw_report(
+        self, report_id, length=None, timeout: float | None = None
+    ) -> bytes | None:
+        if self.proto.h:
+            loop = asyncio.get_running_loop()
+            if timeout is None:
+                timeout = self.timeout
+            job = loop.run_in_executor(
+                self.hid_executor, self.proto.read_raw_report, report_id, length
+            )
+            try:
+                ret = await asyncio.wait_for(job, timeout)
+            except asyncio.TimeoutError:
+                raise ValueError(f"Failure reading report {report_id}: timed out")
+        else:
+            ret = None
+        return ret
+
+    async def read_reports(
+        self, report_ids: list[int], timeout: float | None = None
+    ) -> list[tuple[int, bytes | None, float]]:
+        """
+        see R3PComms.read_reports. all of them in one trip to the worker
+        thread, allowing timeout seconds per report
+        """
+        if self.proto.h and report_ids:
+            loop = asyncio.get_running_loop()
+            if timeout is None:
+                timeout = self.timeout
+            job = loop.run_in_executor(
+                self.hid_executor, self.proto.read_reports, report_ids
+            )
+            try:
+                ret = await asyncio.wait_for(job, timeout * len(report_ids))
+            except asyncio.TimeoutError:
+                raise ValueError(f"Failure reading reports {report_ids}: timed out")
+        else:
+            ret = [(rid, None, time.monotonic()) for rid in report_ids]
+        return ret
+
+    def instrument(self, on: bool = True) -> None:
+        """
+        see R3PComms.instrument
+        """
+        self.proto.instrument(on)
+
+    def stats(self) -> dict:
+        """
+        see R3PComms.stats
+        """
+        return self.proto.stats()
+
+    def schedule(self, refresh: dict[int | str, float] | None = None) -> None:
+        """
+        see R3PComms.schedule
+        """
+        self.proto.schedule(refresh)
+
+    async def get_serial(self) -> dict:
+        proto = self.proto
+        if cached := proto.cached("serial", time.monotonic()):
+            answer, t = cached
+        else:
+            answer = await self.query(proto.serial_msg)
+            t = time.monotonic()
+            proto.store("serial", answer, t)
+        result = proto.decode_serial(answer)
+        if proto.refresh is not None:
+            proto.stamp(result, {}, t)
+        return result
+
+    async def ser_get(self, stamp: bool = False) -> dict:
+        proto = self.proto
+        if cached := proto.cached("metrics", time.monotonic()):
+            answer, t = cached
+        else:
+            answer = await self.query(proto.metrics_msg)
+            t = time.monotonic()
+            proto.store("metrics", answer, t)
+        result = proto.decode_metrics(answer)
+        if stamp or proto.refresh is not None:
+            proto.stamp(result, {}, t)
+        return result
+
+    async def hid_get(self, stamp: bool = False) -> dict:
+        proto = self.proto
+        reports, stamps, due = proto.due_reports()
+        for rid, data, t in await self.read_reports(due):
+            proto.store(rid, data, t)
+            reports[rid] = data
+            stamps[f"h{rid}"] = t
+        result = proto.decode_reports((rid, reports[rid]) for rid in proto.hid_reports)
+        if stamp or proto.refresh is not None:
+            proto.stamp(result, stamps)
+        return result
+
+    async def get(self, overlap: bool = False) -> dict:
+        """
+        all the metrics the open channels provide, see R3PComms.get
+        """
+        metrics = {}
+        if overlap:
+            t0 = time.monotonic()
+            jobs = []
+            if self.s:
+                jobs.append(self.ser_get(stamp=True))
+            if self.proto.h:
+                jobs.append(self.hid_get(stamp=True))
+            results = await asyncio.gather(*jobs)
+            if self.s:
+                ser_metrics = results.pop(0)
+                metrics |= ser_metrics
+                dt = max([t0] + [x.t for x in ser_metrics.values()]) - t0
+                metrics["Serial Latency"] = Sample("i5", dt, dt, "s")
+            if self.proto.h:
+                hid_metrics = results.pop(0)
+                metrics |= hid_metrics
+                dt = max([t0] + [x.t for x in hid_metrics.values()]) - t0
+                metrics["HID Latency"] = Sample("i6", dt, dt, "s")
+            dt = time.monotonic() - t0
+            metrics["Total Latency"] = Sample("i7", dt, dt, "s")
+        else:
+            if self.s:
+                metrics |= await self.ser_get()
+            if self.proto.h:
+                metrics |= await self.hid_get()
+        if self.proto.energy:
+            self.proto.energy.update(metrics)
+        return metrics
+
+    async def samples(
+        self, period: float, count: int = 0, policy: str = "skip"
+    ) -> AsyncIterator[dict]:
+        """
+        yield get() results every period seconds (forever when count is 0),
+        see ticks() for policy
+        """
+        async for _ in ticks(period, count, policy, self.proto.timings):
+            yield await self.get()
+
+
+async def ticks(
+    period: float,
+    count: int = 0,
+    policy: str = "skip",
+    timings: Timings | None = None,
+) -> AsyncIterator[int]:
+    """
+    yield tick numbers every period seconds (forever when count is 0)
+
+    A Scheduler awaited on the event loop: ticks are on absolute deadlines,
+    so time spent by the consumer between ticks does not stretch the period,
+    and ticks missed while the consumer was busy are skipped or caught up on
+    per policy. Tick statistics go to timings when given.
+    """
+    sched = Scheduler(period, policy, timings=timings)
+    n = 0
+    while not count or n < count:
+        await asyncio.sleep(sched.advance())
+        yield sched.begin()
+        n += 1
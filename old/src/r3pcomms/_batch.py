@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+
+import struct
+from collections.abc import Iterable
+from typing import TYPE_CHECKING
+
+from ._crc import CRC16_ARC_TABLE
+from ._r3pcomms import R3PComms
+from ._segments import SEGMENT_DECODERS, SEGMENT_HEADER, UNKNOWN_SEGMENT
+from ._segments import first, negated, tenths
+
+if TYPE_CHECKING:
+    import numpy as np
+
+METRICS_OFFSET = 22  # where a metrics reply's segments start
+OBFUSCATION_OFFSET = 18
+METRICS_ID = 0x02  # frame[17] of metrics queries and replies (0x03: serial)
+# struct codes numpy can view directly
+DTYPES = {"B": "u1", "b": "i1", "H": "<u2", "h": "<i2", "I": "<u4", "L": "<u4"}
+DTYPES |= {"i": "<i4", "l": "<i4", "f": "<f4", "d": "<f8"}
+
+
+class Batch:
+    """
+    Many metrics replies decoded at once
+
+    array has one row per reply that matched the common layout: its index
+    in the input, its sequence number, then a column per segment named like
+    the keys of R3PComms.decode_metrics(). Segments whose decoder can't be
+    vectorized come as their raw bytes. fallback holds (index, result) from
+    the scalar path for CRC-valid replies with any other layout.
+    """
+
+    array: "np.ndarray"
+    fallback: list[tuple[int, dict]]
+    crc_errors: int
+    skipped: int
+
+    def __init__(self, array, fallback, crc_errors, skipped) -> None:
+        self.array = array
+        self.fallback = fallback
+        self.crc_errors = crc_errors
+        self.skipped = skipped
+
+    def __len__(self) -> int:
+        return len(self.array) + len(self.fallback)
+
+
+def split_frames(buf: bytes | bytearray | memoryview) -> list[memoryview]:
+    """
+    the frames of a contiguous buffer of them, by their length fields.
+    anything between frames is skipped; CRCs are not checked here
+    """
+    data = bytes(buf)
+    view = memoryview(data)
+    ret = []
+    i = data.find(b"\xaa\x03")
+    while 0 <= i and i + 4 <= len(data):
+        (var_len,) = struct.unpack_from("<H", data, i + 2)
+        size = 20 + var_len
+        if i + size > len(data):
+            break
+        ret.append(view[i : i + size])
+        i = data.find(b"\xaa\x03", i + size)
+    return ret
+
+
+def crc_ok(frames: "np.ndarray") -> "np.ndarray":
+    """
+    which rows of a 2D uint8 array of frames end in their correct CRC, one
+    table lookup per column for all of them
+    """
+    import numpy as np
+
+    table = np.array(CRC16_ARC_TABLE, dtype=np.uint16)
+    crc = np.zeros(len(frames), dtype=np.uint16)
+    for column in frames.T:
+        crc = (crc >> 8) ^ table[(crc ^ column) & 0xFF]
+    return crc == 0
+
+
+def layout(answer: bytes) -> list[tuple[int, int, int]]:
+    """
+    (type, data offset, length) of every segment of a de-obfuscated
+    metrics answer
+    """
+    ret = []
+    offset = METRICS_OFFSET
+    while offset < len(answer):
+        seg_type, seg_len = SEGMENT_HEADER.unpack_from(answer, offset)
+        ret.append((seg_type, offset + SEGMENT_HEADER.size, seg_len))
+        offset += SEGMENT_HEADER.size + seg_len
+    return ret
+
+
+def column(rows: "np.ndarray", seg_type: int, seg_len: int) -> "np.ndarray":
+    """
+    one segment's values for every row, as decode_metrics() would give them
+    where that can be done with array operations, raw bytes otherwise
+    """
+    import numpy as np
+
+    decoder = SEGMENT_DECODERS.get(seg_type, UNKNOWN_SEGMENT)
+    data = np.ascontiguousarray(rows)
+    codes = decoder.fmt.format.lstrip("<") if decoder.fmt else ""
+    if decoder is UNKNOWN_SEGMENT and seg_len == 4:
+        codes = "HH"
+    if codes and len(set(codes)) == 1 and codes[0] in DTYPES:
+        dtype = np.dtype(DTYPES[codes[0]])
+        if dtype.itemsize * len(codes) == seg_len:
+            values = data.view(dtype)
+            if decoder.convert is first:
+                ret = values[:, 0]
+            elif decoder.convert is negated:
+                ret = -values[:, 0].astype(np.float64)
+            elif decoder.convert is tenths:
+                ret = values[:, 0] / 10
+            elif decoder.convert is None or decoder is UNKNOWN_SEGMENT:
+                ret = values
+            else:
+                ret = None
+            if ret is not None:
+                return ret
+    return data.view(f"V{seg_len}")[:, 0]
+
+
+def decode_batch(
+    frames: Iterable[bytes | bytearray | memoryview] | bytes | bytearray,
+    comms: R3PComms | None = None,
+) -> Batch:
+    """
+    decode the metrics replies among frames (whole wire frames, CRC
+    included, or one contiguous buffer of them) with NumPy, which is needed
+
+    Replies of the most common length are checked (CRC), de-obfuscated and
+    unpacked as 2D arrays; those whose segment headers differ from the
+    first one's are decoded one by one with comms (or a new R3PComms).
+    Frames that aren't metrics replies are skipped.
+    """
+    try:
+        import numpy as np
+    except ImportError:
+        raise ImportError("decode_batch() needs numpy (pip install numpy)") from None
+
+    if isinstance(frames, (bytes, bytearray, memoryview)):
+        frames = split_frames(frames)
+    d = comms or R3PComms()
+    candidates = {}  # length -> [(index, frame)]
+    skipped = 0
+    for i, frame in enumerate(frames):
+        if len(frame) > METRICS_OFFSET + 2 and frame[17] == METRICS_ID:
+            candidates.setdefault(len(frame), []).append((i, frame))
+        else:
+            skipped += 1
+
+    common = max(candidates, key=lambda n: len(candidates[n]), default=None)
+    others = [x for (n, xs) in candidates.items() if n != common for x in xs]
+    crc_errors = 0
+    array = np.zeros(0, dtype=[("index", "<i8"), ("seq", "<u4")])
+    if common is not None:
+        index = np.array([i for (i, _) in candidates[common]], dtype=np.int64)
+        rows = np.frombuffer(
+            b"".join(bytes(f) for (_, f) in candidates[common]), dtype=np.uint8
+        ).reshape(-1, common)
+        ok = crc_ok(rows)
+        crc_errors += int((~ok).sum())
+        index = index[ok]
+        rows = rows[ok].copy()
+
+        # every reply XORed with the low byte of its own sequence number
+        rows[:, OBFUSCATION_OFFSET:] ^= rows[:, 6:7]
+        rows = rows[:, :-2]  # the answer, without its CRC
+
+        if len(rows):
+            segments = layout(rows[0].tobytes())
+            headers = [
+                offset - SEGMENT_HEADER.size + k
+                for (_, offset, _) in segments
+                for k in range(SEGMENT_HEADER.size)
+            ]
+            same = (rows[:, headers] == rows[0, headers]).all(axis=1)
+            frame_at = dict(candidates[common])
+            others += [(i, frame_at[i]) for i in index[~same].tolist()]
+            index = index[same]
+            rows = rows[same]
+
+            names = []
+            seen = {}
+            for seg_type, _, _ in segments:
+                name = SEGMENT_DECODERS.get(seg_type, UNKNOWN_SEGMENT).name
+                n = seen.get(name)
+                seen[name] = 0 if n is None else n + 1
+                names.append(name if n is None else f"{name}{n}")
+
+            columns = []
+            for seg_type, offset, seg_len in segments:
+                data = rows[:, offset : offset + seg_len]
+                if seg_type == 22 and d.redact_sn:
+                    # as serial_segmenter() redacts it
+                    data = np.full_like(data, 0xFF)
+                columns.append(column(data, seg_type, seg_len))
+            seq = np.ascontiguousarray(rows[:, 6:10]).view("<u4")[:, 0]
+            fields = [("index", "<i8"), ("seq", "<u4")] + [
+                (name, col.dtype, col.shape[1:]) for (name, col) in zip(names, columns)
+            ]
+            array = np.empty(len(rows), dtype=fields)
+            array["index"] = index
+            array["seq"] = seq
+            for name, col in zip(names, columns):
+                array[name] = col
+
+    fallback = []
+    for i, frame in sorted(others, key=lambda x: x[0]):
+        if R3PComms.crc16(frame):
+            crc_errors += 1
+        else:
+            fallback.append((i, d.decode_metrics(bytes(frame[:-2]))))
+    return Batch(array, fallback, crc_errors, skipped)
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+
+from collections.abc import Iterable
+
+
+def _make_table(poly: int = 0xA001) -> tuple[int, ...]:
+    table = []
+    for byte in range(256):
+        crc = byte
+        for _ in range(8):
+            if crc & 0x1:
+                crc = (crc >> 1) ^ poly
+            else:
+                crc >>= 1
+        table.append(crc)
+    return tuple(table)
+
+
+CRC16_ARC_TABLE = _make_table()
+
+
+def crc16(data: bytes | bytearray | memoryview, crc: int = 0x0000) -> int:
+    """
+    CRC-16/ARC, one table lookup per byte
+    """
+    table = CRC16_ARC_TABLE
+    for b in data:
+        crc = (crc >> 8) ^ table[(crc ^ b) & 0xFF]
+    return crc
+
+
+def crc16_many(frames: Iterable[bytes | bytearray | memoryview]) -> list[int]:
+    """
+    CRC-16/ARC of each frame in frames
+    """
+    return [crc16(frame) for frame in frames]
+
+
+class CRC16:
+    """
+    Incremental CRC-16/ARC, for checksumming a frame while its bytes arrive
+    """
+
+    __slots__ = ("crc",)
+
+    crc: int
+
+    def __init__(self, data: bytes | bytearray | memoryview = b"") -> None:
+        self.crc = 0x0000
+        if data:
+            self.update(data)
+
+    def update(self, data: bytes | bytearray | memoryview) -> "CRC16":
+        self.crc = crc16(data, self.crc)
+        return self
+
+    def reset(self) -> None:
+        self.crc = 0x0000
+
+    def digest(self) -> bytes:
+        """
+        the checksum as it appears on the wire (little endian)
+        """
+        return self.crc.to_bytes(2, "little")
+
+    def valid(self) -> bool:
+        """
+        True when the data so far ends with its own correct checksum
+        """
+        return self.crc == 0
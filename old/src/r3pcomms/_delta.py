@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+
+from collections.abc import Iterable, Iterator, Mapping
+from typing import Any
+
+from ._sample import Sample
+
+# changes smaller than this (in the field's unit) aren't worth a delta
+DEFAULT_DEADBANDS = {
+    "Total Load": 0.5,
+    "Total Draw": 0.5,
+    "AC Draw": 0.5,
+    "Solar/DC Draw": 0.5,
+    "AC Load": 0.5,
+    "DC Load": 0.5,
+    "USB-A Load": 0.5,
+    "USB-C Load": 0.5,
+}
+
+KEYFRAME = "Keyframe"
+
+
+def _value(sample: Any) -> Any:
+    # a Sample, or a Sample.as_dict() read back from json
+    return sample["value"]
+
+
+def _numeric(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+class DeltaEncoder:
+    """
+    Turns a stream of get() style results into change-only records
+
+    The first result, and every keyframe-th one after it, is passed through
+    whole; the rest keep only the fields whose value changed since it was
+    last sent. Numbers within deadbands[name] of the last sent value count
+    as unchanged (element wise for lists of numbers). A result missing a
+    field that was sent is passed through whole too, as a delta can't say
+    a field is gone. Every record gets a "Keyframe" field saying which kind
+    it is, so rebuild() can put the full results back together.
+    """
+
+    keyframe: int
+    deadbands: dict[str, float]
+    sent: dict[str, Any]
+    count: int
+
+    def __init__(
+        self, keyframe: int = 60, deadbands: Mapping[str, float] | None = None
+    ) -> None:
+        if keyframe < 1:
+            raise ValueError(f"keyframe must be at least 1, not {keyframe}")
+        self.keyframe = keyframe
+        self.deadbands = DEFAULT_DEADBANDS | dict(deadbands or {})
+        self.sent = {}
+        self.count = 0
+
+    def reset(self) -> None:
+        """
+        make the next record a keyframe
+        """
+        self.sent = {}
+        self.count = 0
+
+    def changed(self, name: str, value: Any) -> bool:
+        if name not in self.sent:
+            return True
+        last = self.sent[name]
+        band = self.deadbands.get(name, 0.0)
+        if band and _numeric(value) and _numeric(last):
+            return abs(value - last) >= band
+        if (
+            band
+            and isinstance(value, (list, tuple))
+            and isinstance(last, (list, tuple))
+            and len(value) == len(last)
+            and all(map(_numeric, value))
+            and all(map(_numeric, last))
+        ):
+            # eg. Temperatures, per element
+            return any(abs(a - b) >= band for (a, b) in zip(value, last))
+        return value != last
+
+    def encode(self, result: dict) -> dict:
+        full = self.count % self.keyframe == 0 or not self.sent.keys() <= result.keys()
+        if full:
+            self.count = 0
+            self.sent = {}
+            ret = {KEYFRAME: Sample("i8", True, True, "")}
+        else:
+            ret = {KEYFRAME: Sample("i8", False, False, "")}
+        self.count += 1
+        for name, sample in result.items():
+            value = _value(sample)
+            if full or self.changed(name, value):
+                self.sent[name] = value
+                ret[name] = sample
+        return ret
+
+
+def rebuild(records: Iterable[Mapping]) -> Iterator[dict]:
+    """
+    full results back from DeltaEncoder records (Samples or their json
+    dicts), skipping deltas that arrive before the first keyframe
+    """
+    state = None
+    for record in records:
+        keyframe = _value(record[KEYFRAME]) if KEYFRAME in record else True
+        if keyframe:
+            state = {}
+        if state is None:
+            continue
+        state |= {k: v for (k, v) in record.items() if k != KEYFRAME}
+        yield dict(state)
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+
+import glob
+import os
+
+
+def default_path() -> str:
+    cache = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.path.join(cache, "r3pcomms", "devices")
+
+
+def identity(path: str) -> tuple[int, int] | None:
+    """
+    (device number, inode change time) of a device node, None if it's gone.
+    udev recreates the node whenever the device is re-plugged, so this also
+    changes when a different device ends up at the same path
+    """
+    try:
+        st = os.stat(path)
+    except OSError:
+        ret = None
+    else:
+        ret = (st.st_rdev, st.st_ctime_ns)
+    return ret
+
+
+class DeviceCache:
+    """
+    Remembers which /dev node a lookup key (eg. "hid:3746:ffff") resolved to
+
+    One tab separated line per key: key, path, device number, ctime. An
+    entry is only handed out while a stat() of its path still matches, so
+    a lookup costs one small file read and one stat instead of enumerating
+    the bus.
+    """
+
+    path: str
+    entries: dict[str, tuple[str, int, int]] | None
+
+    def __init__(self, path: str | None = None) -> None:
+        self.path = path or default_path()
+        self.entries = None
+
+    def load(self) -> dict[str, tuple[str, int, int]]:
+        if self.entries is None:
+            self.entries = {}
+            try:
+                with open(self.path) as f:
+                    for line in f:
+                        try:
+                            key, path, rdev, ctime = line.rstrip("\n").split("\t")
+                            self.entries[key] = (path, int(rdev), int(ctime))
+                        except ValueError:
+                            pass
+            except OSError:
+                pass
+        return self.entries
+
+    def get(self, key: str) -> str | None:
+        """
+        key's cached device path, if that device node is still the same one
+        """
+        ret = None
+        entry = self.load().get(key)
+        if entry:
+            path, rdev, ctime = entry
+            if identity(path) == (rdev, ctime):
+                ret = path
+        return ret
+
+    def put(self, key: str, path: str) -> None:
+        """
+        remember path for key; silently does nothing if it can't be saved
+        """
+        ident = identity(path)
+        if ident is None or self.load().get(key) == (path, *ident):
+            return
+        self.entries[key] = (path, *ident)
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp = f"{self.path}.{os.getpid()}"
+            with open(tmp, "w") as f:
+                for k, (p, rdev, ctime) in self.entries.items():
+                    f.write(f"{k}\t{p}\t{rdev}\t{ctime}\n")
+            os.replace(tmp, self.path)
+        except OSError:
+            pass
+
+
+def find_tty(serial_number: str) -> list[str]:
+    """
+    /dev paths of the USB serial ports whose USB device has this serial
+    number, from sysfs alone
+    """
+    ret = []
+    for tty in sorted(glob.glob("/sys/class/tty/ttyACM*")):
+        # the interface's parent is the USB device, which has the serial
+        try:
+            with open(os.path.join(tty, "device", "..", "serial")) as f:
+                if f.read().strip() == serial_number:
+                    ret.append(f"/dev/{os.path.basename(tty)}")
+        except OSError:
+            pass
+    return ret
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+
+import os
+import random
+import select
+import struct
+import threading
+import time
+import tty
+
+from ._crc import crc16
+from ._framer import Framer
+from ._segments import SEGMENT_DECODERS, SEGMENT_HEADER
+
+# segments of the metrics reply in the README, as (type, wire data)
+DEFAULT_SEGMENTS = {
+    2: bytes.fromhex("00000000"),
+    3: bytes.fromhex("00320000"),
+    4: bytes.fromhex("1a1c1919"),
+    5: bytes.fromhex("00000000"),
+    6: bytes.fromhex("00000000"),
+    7: bytes.fromhex("54628143"),
+    8: bytes.fromhex("b7a1e941"),
+    9: bytes.fromhex("00000000"),
+    10: bytes.fromhex("00000000"),
+    11: bytes.fromhex("00000000"),
+    12: bytes.fromhex("b7a1e941"),
+    13: bytes.fromhex("58020000"),
+    14: bytes.fromhex("546281c3"),
+    15: bytes.fromhex("3c000000"),
+    16: bytes.fromhex("00000000"),
+    17: bytes.fromhex("00000000"),
+    18: bytes.fromhex("00000000"),
+    19: bytes.fromhex("00000000"),
+    20: bytes.fromhex("00000000"),
+    21: bytes.fromhex("00000000"),
+    22: b"R3P0000000000000",
+    23: bytes.fromhex("33170000"),
+    24: bytes.fromhex("00000000"),
+    25: bytes.fromhex("23010002"),
+}
+METRICS_CMD = bytes.fromhex("de2d")
+SERIAL_CMD = bytes.fromhex("f40d")
+
+
+class Emulator:
+    """
+    A River 3 Plus on the serial side, behind a pseudo-terminal
+
+    Answers metrics and serial number queries like the real unit: same
+    framing, CRC-16/ARC and sequence number XOR obfuscation. Segment values
+    are set per type with set(). Replies can be delayed by latency (plus up
+    to jitter) seconds, and with the given probabilities have bytes dropped
+    from them or their CRC corrupted. Use as a context manager, or start()
+    and stop(); port is the path to hand to R3PComms.
+    """
+
+    segments: dict[int, bytes]
+    latency: float
+    jitter: float
+    drop_rate: float
+    corrupt_rate: float
+    random: random.Random
+    port: str | None
+    requests: int
+    dropped: int
+    corrupted: int
+    fds: tuple[int, int] | None
+    thread: threading.Thread | None
+    running: bool
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        drop_rate: float = 0.0,
+        corrupt_rate: float = 0.0,
+        seed: int | None = None,
+    ) -> None:
+        self.segments = dict(DEFAULT_SEGMENTS)
+        self.latency = latency
+        self.jitter = jitter
+        self.drop_rate = drop_rate
+        self.corrupt_rate = corrupt_rate
+        self.random = random.Random(seed)
+        self.port = None
+        self.requests = 0
+        self.dropped = 0
+        self.corrupted = 0
+        self.fds = None
+        self.thread = None
+        self.running = False
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.stop()
+
+    def set(self, seg_type: int, value) -> None:
+        """
+        set a segment's wire data, from bytes, or from a value (tuple) packed
+        with that segment type's decoder format
+        """
+        if not isinstance(value, (bytes, bytearray)):
+            if not isinstance(value, tuple):
+                value = (value,)
+            value = SEGMENT_DECODERS[seg_type].fmt.pack(*value)
+        self.segments[seg_type] = bytes(value)
+
+    @property
+    def serial_number(self) -> bytes:
+        return self.segments[22]
+
+    @serial_number.setter
+    def serial_number(self, value: bytes) -> None:
+        self.segments[22] = value
+
+    @staticmethod
+    def wrap(body: bytes) -> bytes:
+        head = struct.pack("<HH", 0x03AA, len(body) - 14) + body
+        return head + struct.pack("<H", crc16(head))
+
+    @staticmethod
+    def segment_bytes(segments: dict[int, bytes]) -> bytes:
+        return b"".join(
+            SEGMENT_HEADER.pack(seg_type, len(data)) + data
+            for (seg_type, data) in segments.items()
+        )
+
+    def reply(self, request: bytes | memoryview) -> bytes | None:
+        """
+        the unit's answer to one request frame, None for unknown commands
+        """
+        request = bytes(request)
+        seq = request[6:10]
+        cmd = request[4:6]
+        if cmd == METRICS_CMD:
+            key = seq[0]
+            clear = b"\x39\x2f" + seq + bytes.fromhex("0144022201016602")
+            data = bytes.fromhex("01010000") + self.segment_bytes(self.segments)
+            ret = self.wrap(clear + bytes(x ^ key for x in data))
+        elif cmd == SERIAL_CMD:
+            clear = b"\x39\x2f" + seq + bytes.fromhex("014402220101660301")
+            ret = self.wrap(clear + self.segment_bytes({22: self.serial_number}))
+        else:
+            ret = None
+        return ret
+
+    def mangle(self, reply: bytes) -> bytes:
+        """
+        apply the configured faults to a reply
+        """
+        if self.corrupt_rate and self.random.random() < self.corrupt_rate:
+            self.corrupted += 1
+            reply = reply[:-1] + bytes([reply[-1] ^ 0xFF])
+        if self.drop_rate and self.random.random() < self.drop_rate:
+            self.dropped += 1
+            i = self.random.randrange(len(reply))
+            n = self.random.randint(1, 8)
+            reply = reply[:i] + reply[i + n :]
+        return reply
+
+    def start(self) -> str:
+        controller, port = os.openpty()
+        tty.setraw(port)
+        self.fds = (controller, port)
+        self.port = os.ttyname(port)
+        self.running = True
+        self.thread = threading.Thread(target=self.serve, daemon=True)
+        self.thread.start()
+        return self.port
+
+    def stop(self) -> None:
+        self.running = False
+        if self.thread:
+            self.thread.join()
+            self.thread = None
+        if self.fds:
+            for fd in self.fds:
+                os.close(fd)
+            self.fds = None
+
+    def serve(self) -> None:
+        controller = self.fds[0]
+        framer = Framer()
+        while self.running:
+            if not select.select([controller], [], [], 0.05)[0]:
+                continue
+            try:
+                framer.feed(os.read(controller, 4096))
+            except OSError:
+                return
+            for request in [bytes(frame) for frame in framer.frames()]:
+                self.requests += 1
+                reply = self.reply(request)
+                if reply is None:
+                    continue
+                delay = self.latency + self.jitter * self.random.random()
+                if delay:
+                    time.sleep(delay)
+                os.write(controller, self.mangle(reply))
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+
+import contextlib
+import json
+import os
+import time
+from collections.abc import Iterable
+
+from ._sample import Sample
+
+# the power fields (W) of a metrics reply that get an energy counter
+POWER_FIELDS = (
+    "Total Load",
+    "Total Draw",
+    "AC Draw",
+    "Solar/DC Draw",
+    "AC Load",
+    "DC Load",
+    "USB-A Load",
+    "USB-C Load",
+)
+
+
+def default_path() -> str:
+    state = os.environ.get("XDG_STATE_HOME") or os.path.expanduser("~/.local/state")
+    return os.path.join(state, "r3pcomms", "energy.json")
+
+
+class EnergyMeter:
+    """
+    Cumulative energy (Wh) per power field, integrated as results arrive
+
+    Each field's power is integrated with the trapezoid rule between
+    consecutive monotonic timestamps (the fields' own t when they have one).
+    Intervals longer than max_gap seconds aren't integrated at all, so
+    an outage or a stalled poller adds nothing rather than a guess. Only the
+    counters and each field's last point are kept. With a path, the
+    counters are loaded from it and saved back every save_every seconds
+    and on close(); the integration restarts after a restart.
+    """
+
+    path: str | None
+    max_gap: float
+    save_every: float
+    fields: tuple[str, ...]
+    wh: dict[str, float]
+    last: dict[str, tuple[float, float]]
+    saved: float
+    gaps: int
+
+    def __init__(
+        self,
+        path: str | None = None,
+        max_gap: float = 60.0,
+        save_every: float = 60.0,
+        fields: Iterable[str] = POWER_FIELDS,
+    ) -> None:
+        self.path = path
+        self.max_gap = max_gap
+        self.save_every = save_every
+        self.fields = tuple(fields)
+        self.wh = dict.fromkeys(self.fields, 0.0)
+        self.last = {}
+        self.saved = time.monotonic()
+        self.gaps = 0
+        if path:
+            self.load()
+
+    @classmethod
+    def maybe(
+        cls, path: str | None, max_gap: float = 60.0
+    ) -> "EnergyMeter | contextlib.nullcontext":
+        """
+        an EnergyMeter saving to path, or a context manager giving None
+        without one
+        """
+        return cls(path, max_gap) if path else contextlib.nullcontext()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
+
+    def load(self) -> None:
+        try:
+            with open(self.path) as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return
+        for name, wh in saved.items():
+            if name in self.wh and isinstance(wh, (int, float)):
+                self.wh[name] = float(wh)
+
+    def save(self) -> None:
+        """
+        write the counters to path, atomically
+        """
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = f"{self.path}.{os.getpid()}"
+        with open(tmp, "w") as f:
+            json.dump(self.wh, f)
+        os.replace(tmp, self.path)
+        self.saved = time.monotonic()
+
+    def close(self) -> None:
+        self.save()
+
+    def add(self, name: str, t: float, watts: float) -> None:
+        """
+        integrate one field up to time t, where its power was watts
+        """
+        prev = self.last.get(name)
+        if prev is not None:
+            t0, w0 = prev
+            dt = t - t0
+            if dt <= 0:
+                return  # the same (cached) reading again
+            if dt <= self.max_gap:
+                self.wh[name] += (w0 + watts) * dt / 7200
+            else:
+                self.gaps += 1
+        self.last[name] = (t, watts)
+
+    def update(self, result: dict, t: float | None = None) -> dict:
+        """
+        integrate a get() style result and add an "<field> Energy" counter
+        for each of its power fields. t defaults to now (time.monotonic())
+        """
+        now = time.monotonic()
+        if t is None:
+            t = now
+        for i, name in enumerate(self.fields):
+            sample = result.get(name)
+            if sample is None:
+                continue
+            # loads come as negative numbers
+            self.add(name, t if sample.t is None else sample.t, abs(sample.value))
+            wh = self.wh[name]
+            result[f"{name} Energy"] = Sample(f"e{i}", wh, wh, "Wh")
+        if self.path and now - self.saved >= self.save_every:
+            self.save()
+        return result
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+
+import struct
+from collections.abc import Iterator
+
+from ._crc import crc16
+
+
+class Framer:
+    """
+    Resynchronizing parser for the framed serial protocol
+
+    Bytes go in with feed(), complete CRC-valid frames come out of frames()
+    as memoryviews into the internal buffer (no copies). A yielded frame is
+    only valid until the next call to feed(). Corrupt or misaligned data is
+    counted and skipped instead of raising. A preamble whose length field
+    claims more than max_len bytes, or whose frame is still incomplete when
+    a whole valid frame is already buffered after it, is taken to be false.
+    """
+
+    preamble = b"\xaa\x03"
+    header_len = 4
+    base_len = 20  # frame length when the header's length field is 0
+    # the largest known frame is the 204 byte metrics reply
+    max_len = 1024
+
+    buf: bytearray
+    view: memoryview
+    start: int
+    end: int
+    frame_count: int
+    crc_errors: int
+    dropped_bytes: int
+
+    def __init__(self, capacity: int = 4096) -> None:
+        self.buf = bytearray(capacity)
+        self.view = memoryview(self.buf)
+        self.frame_count = 0
+        self.crc_errors = 0
+        self.dropped_bytes = 0
+        self.reset()
+
+    def reset(self) -> None:
+        self.start = 0
+        self.end = 0
+
+    def __len__(self) -> int:
+        return self.end - self.start
+
+    def feed(self, data: bytes | bytearray | memoryview) -> None:
+        capacity = len(self.buf)
+        size = len(data)
+        if size > capacity:
+            # only the tail can possibly fit, everything buffered is lost too
+            self.dropped_bytes += len(self) + size - capacity
+            data = memoryview(data)[size - capacity :]
+            size = capacity
+            self.reset()
+        if self.end + size > capacity:
+            pending = len(self)
+            if pending + size > capacity:
+                overflow = pending + size - capacity
+                self.dropped_bytes += overflow
+                self.start += overflow
+                pending -= overflow
+            self.buf[:pending] = bytes(self.view[self.start : self.end])
+            self.start = 0
+            self.end = pending
+        self.buf[self.end : self.end + size] = data
+        self.end += size
+
+    def frames(self) -> Iterator[memoryview]:
+        buf = self.buf
+        view = self.view
+        capacity = len(buf)
+        while True:
+            pos = buf.find(self.preamble, self.start, self.end)
+            if pos < 0:
+                # keep a trailing 0xaa, it might be the start of the next preamble
+                keep = 1 if self.end > self.start and buf[self.end - 1] == 0xAA else 0
+                self.dropped_bytes += len(self) - keep
+                self.start = self.end - keep
+                break
+            self.dropped_bytes += pos - self.start
+            self.start = pos
+            if len(self) < self.header_len:
+                break
+            (var_len,) = struct.unpack_from("<H", buf, pos + 2)
+            frame_len = self.base_len + var_len
+            if frame_len > min(capacity, self.max_len):
+                # can't be a real frame, must have locked on to a false preamble
+                self.dropped_bytes += 1
+                self.start += 1
+                continue
+            if len(self) < frame_len:
+                # the rest may never come if the preamble was false, so don't
+                # sit on a valid frame that's already here behind it
+                nxt = self.next_valid(pos + 1)
+                if nxt < 0:
+                    break
+                self.dropped_bytes += nxt - pos
+                self.start = nxt
+                continue
+            frame = view[pos : pos + frame_len]
+            if crc16(frame) == 0:
+                self.frame_count += 1
+                self.start += frame_len
+                yield frame
+            else:
+                self.crc_errors += 1
+                self.dropped_bytes += 1
+                self.start += 1
+
+    def next_valid(self, start: int) -> int:
+        """
+        where the first complete CRC-valid frame buffered from start on
+        begins, -1 when there's none
+        """
+        buf = self.buf
+        while (pos := buf.find(self.preamble, start, self.end)) >= 0:
+            if self.end - pos < self.header_len:
+                break
+            (var_len,) = struct.unpack_from("<H", buf, pos + 2)
+            frame_len = self.base_len + var_len
+            if (
+                frame_len <= self.end - pos
+                and crc16(self.view[pos : pos + frame_len]) == 0
+            ):
+                return pos
+            start = pos + 1
+        return -1
+
+    def stats(self) -> dict:
+        return {
+            "frames": self.frame_count,
+            "crc_errors": self.crc_errors,
+            "dropped_bytes": self.dropped_bytes,
+        }
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+
+import glob
+import os
+import sys
+
+try:
+    import fcntl
+except ImportError:  # not on Linux, available() will be False anyway
+    fcntl = None
+
+SYSFS_HIDRAW = "/sys/class/hidraw"
+HID_MAX_DESCRIPTOR_SIZE = 4096
+# _IOR('H', 0x01, int) and _IOR('H', 0x02, struct hidraw_report_descriptor)
+HIDIOCGRDESCSIZE = (2 << 30) | (4 << 16) | (ord("H") << 8) | 0x01
+HIDIOCGRDESC = (
+    (2 << 30) | ((4 + HID_MAX_DESCRIPTOR_SIZE) << 16) | (ord("H") << 8) | 0x02
+)
+
+
+def HIDIOCGFEATURE(length: int) -> int:
+    # _IOC(_IOC_WRITE | _IOC_READ, 'H', 0x07, length) from linux/hidraw.h
+    return (3 << 30) | (length << 16) | (ord("H") << 8) | 0x07
+
+
+def available() -> bool:
+    """
+    True when hidraw devices can be used directly (Linux with sysfs)
+    """
+    return sys.platform.startswith("linux") and os.path.isdir(SYSFS_HIDRAW)
+
+
+def find_hidraw_devices(pid: int, vid: int) -> list[str]:
+    """
+    /dev/hidrawN paths of every device matching vid:pid, from sysfs alone
+    """
+    ret = []
+    want = f"{vid:08X}:{pid:08X}"
+    for uevent in sorted(glob.glob(f"{SYSFS_HIDRAW}/hidraw*/device/uevent")):
+        try:
+            with open(uevent) as f:
+                for line in f:
+                    # eg. HID_ID=0003:00003746:0000FFFF
+                    if line.startswith("HID_ID=") and line.strip()[-17:] == want:
+                        node = uevent.split("/")[-3]
+                        ret.append(f"/dev/{node}")
+                        break
+        except OSError:
+            pass
+    return ret
+
+
+class HidrawDevice:
+    """
+    Just enough of hid.device, straight on top of a Linux hidraw node
+
+    Feature reports are fetched with the HIDIOCGFEATURE ioctl into buffers
+    that are allocated once per report length and then reused, the report
+    descriptor with HIDIOCGRDESC.
+    """
+
+    fd: int | None
+    bufs: dict[int, bytearray]
+
+    def __init__(self) -> None:
+        self.fd = None
+        self.bufs = {}
+
+    def open_path(self, path: bytes | str) -> None:
+        self.fd = os.open(path, os.O_RDWR)
+
+    def close(self) -> None:
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+    def get_feature_report_into(self, report_id: int, buf: bytearray) -> int:
+        """
+        read report_id into buf, returns how many bytes the device sent
+        """
+        buf[0] = report_id
+        return fcntl.ioctl(self.fd, HIDIOCGFEATURE(len(buf)), buf, True)
+
+    def get_report_descriptor(self, max_length: int = HID_MAX_DESCRIPTOR_SIZE) -> bytes:
+        size = bytearray(4)
+        fcntl.ioctl(self.fd, HIDIOCGRDESCSIZE, size, True)
+        n = min(int.from_bytes(size, sys.byteorder), max_length)
+        # struct hidraw_report_descriptor: __u32 size, __u8 value[4096]
+        buf = bytearray(4 + HID_MAX_DESCRIPTOR_SIZE)
+        buf[:4] = n.to_bytes(4, sys.byteorder)
+        fcntl.ioctl(self.fd, HIDIOCGRDESC, buf, True)
+        return bytes(buf[4 : 4 + n])
+
+    def get_feature_report(self, report_id: int, length: int) -> bytes:
+        buf = self.bufs.get(length)
+        if buf is None:
+            buf = self.bufs[length] = bytearray(length)
+        n = self.get_feature_report_into(report_id, buf)
+        return bytes(buf[:n])
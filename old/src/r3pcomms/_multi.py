@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+
+import asyncio
+from collections.abc import AsyncIterator, Mapping
+
+from ._async import AsyncR3PComms, ticks
+from ._r3pcomms import R3PComms
+
+
+def discover(hiddev: str = "3746:ffff", backend: str = "auto") -> list[str]:
+    """
+    hidraw paths of every attached unit matching VENDOR_ID:PRODUCT_ID
+    """
+    vid, pid = hiddev.split(":")
+    paths = R3PComms.find_hid_devices(int(pid, 16), int(vid, 16), backend)
+    return [path.decode() for path in paths]
+
+
+def claim(hids: list[str], backend: str = "auto") -> list[str]:
+    """
+    hids with every VENDOR_ID:PRODUCT_ID resolved to a hidraw path of its
+    own, never one named outright or taken by an earlier spec. raises
+    ValueError when there are more specs than matching units
+    """
+    claimed = {hid for hid in hids if hid.startswith("/dev/")}
+    free = {}
+    ret = []
+    for hid in hids:
+        if hid and not hid.startswith("/dev/"):
+            if hid not in free:
+                free[hid] = [p for p in discover(hid, backend) if p not in claimed]
+            if not free[hid]:
+                raise ValueError(f"not enough {hid} units attached for every --hid")
+            hid = free[hid].pop(0)
+        ret.append(hid)
+    return ret
+
+
+async def poll_many(
+    devices: Mapping[str, AsyncR3PComms],
+    period: float,
+    count: int = 0,
+    overlap: bool = False,
+    policy: str = "skip",
+) -> AsyncIterator[tuple[str, dict | Exception]]:
+    """
+    poll every device every period seconds (forever when count is 0)
+
+    Each device gets its own task on the running event loop, so one slow or
+    dead unit only costs its own per-request timeout and never delays the
+    others. Yields (name, result) as results arrive, where result is either
+    the device's get() output or the exception that poll raised. A device
+    that can't be opened yields its exception once and is then dropped.
+    Missed polls are handled per policy, see ticks().
+    """
+    queue: asyncio.Queue[tuple[str, dict | Exception] | None] = asyncio.Queue()
+
+    async def poll_one(name: str, dev: AsyncR3PComms) -> None:
+        try:
+            async with dev:
+                async for _ in ticks(period, count, policy, dev.proto.timings):
+                    try:
+                        result = await dev.get(overlap)
+                    except Exception as e:
+                        result = e
+                    await queue.put((name, result))
+        except Exception as e:
+            await queue.put((name, e))
+        finally:
+            await queue.put(None)
+
+    tasks = [asyncio.create_task(poll_one(n, d)) for (n, d) in devices.items()]
+    running = len(tasks)
+    try:
+        while running:
+            item = await queue.get()
+            if item is None:
+                running -= 1
+            else:
+                yield item
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
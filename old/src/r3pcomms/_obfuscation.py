@@ -0,0 +1,22 @@
+#!/usr/bin/env python3
+
+# the key is one byte (the low byte of the sequence number), so each of the
+# 256 possible keys gets a bytes.translate() table, built on first use
+_tables: list[bytes | None] = [None] * 256
+
+
+def xor_table(key: int) -> bytes:
+    key &= 0xFF
+    table = _tables[key]
+    if table is None:
+        table = _tables[key] = bytes(x ^ key for x in range(256))
+    return table
+
+
+def deobfuscate(data: bytes | bytearray | memoryview, key: int) -> bytes:
+    """
+    data with every byte XORed with the low byte of key
+    """
+    if isinstance(data, memoryview):
+        data = data.tobytes()
+    return bytes(data.translate(xor_table(key)))
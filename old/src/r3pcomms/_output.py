@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+
+import csv
+import json
+import struct
+from collections.abc import Callable, Iterator
+from types import SimpleNamespace
+from typing import Any, BinaryIO
+
+from ._sample import Sample
+
+MAGIC = b"R3PBIN01"
+# payload length, record kind
+RECORD = struct.Struct("<IB")
+SCHEMA, VALUES = 0, 1
+STRING = struct.Struct("<H")
+
+
+class Encoder:
+    """
+    Writes get() style results to a binary stream, one json line each
+
+    This is the original dict-of-dicts output. Subclasses encode more
+    compactly; all of them collect their output in memory and only write it
+    to stream every flush_every records (or once buffer_size bytes are
+    waiting), and on flush() and close(). before_flush, when given, is
+    called first, eg. sys.stdout.flush so that text printed meanwhile keeps
+    its place.
+    """
+
+    stream: BinaryIO
+    flush_every: int
+    buffer_size: int
+    before_flush: Callable[[], None] | None
+    buf: bytearray
+    pending: int
+    records: int
+
+    def __init__(
+        self,
+        stream: BinaryIO,
+        flush_every: int = 1,
+        buffer_size: int = 1 << 16,
+        before_flush: Callable[[], None] | None = None,
+    ) -> None:
+        self.stream = stream
+        self.flush_every = flush_every
+        self.buffer_size = buffer_size
+        self.before_flush = before_flush
+        self.buf = bytearray()
+        self.pending = 0
+        self.records = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
+
+    def encode(self, result: dict) -> bytes:
+        return json.dumps(result, default=Sample.as_dict).encode() + b"\n"
+
+    def write(self, result: dict) -> None:
+        self.buf += self.encode(result)
+        self.records += 1
+        self.pending += 1
+        if self.pending >= self.flush_every or len(self.buf) >= self.buffer_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if self.before_flush:
+            self.before_flush()
+        if self.buf:
+            self.stream.write(self.buf)
+            self.buf.clear()
+        self.stream.flush()
+        self.pending = 0
+
+    def close(self) -> None:
+        self.flush()
+
+
+class CompactEncoder(Encoder):
+    """
+    NDJSON with the field names, types and units in a schema line
+
+    Each record is then just a json array of the values in schema order. A
+    new schema line is only written when the set of fields changes (eg.
+    with --delta).
+    """
+
+    names: tuple[str, ...] | None
+    dumps: Callable[[object], str]
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.names = None
+        self.dumps = json.JSONEncoder(separators=(",", ":")).encode
+
+    def encode(self, result: dict) -> bytes:
+        names = tuple(result)
+        head = b""
+        if names != self.names:
+            self.names = names
+            schema = [[k, s.type, s.unit] for (k, s) in result.items()]
+            head = self.dumps({"schema": schema}).encode() + b"\n"
+        values = [s.value for s in result.values()]
+        return head + self.dumps(values).encode() + b"\n"
+
+
+class CSVEncoder(Encoder):
+    """
+    CSV with one header row, taken from the first result
+
+    List values (eg. Temperatures) get a column per element, named
+    "Name[i]". Fields missing from later results are left empty and fields
+    that weren't in the first one are left out.
+    """
+
+    columns: list[tuple[str, int | None]] | None
+    lines: list[str]
+    writer: Any
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.columns = None
+        self.lines = []
+        self.writer = csv.writer(
+            SimpleNamespace(write=self.lines.append), lineterminator="\n"
+        )
+
+    def encode(self, result: dict) -> bytes:
+        if self.columns is None:
+            self.columns = []
+            for name, sample in result.items():
+                if isinstance(sample.value, (list, tuple)):
+                    self.columns += [(name, i) for i in range(len(sample.value))]
+                else:
+                    self.columns.append((name, None))
+            self.writer.writerow(
+                name if i is None else f"{name}[{i}]" for (name, i) in self.columns
+            )
+        row = []
+        for name, i in self.columns:
+            sample = result.get(name)
+            if sample is None:
+                row.append("")
+            elif i is None:
+                row.append(sample.value)
+            else:
+                row.append(sample.value[i])
+        self.writer.writerow(row)
+        ret = "".join(self.lines).encode()
+        self.lines.clear()
+        return ret
+
+
+class BinaryEncoder(Encoder):
+    """
+    Length prefixed binary records, after an 8 byte magic
+
+    Every record is a RECORD header (payload length, kind) then its
+    payload. A SCHEMA record (json: [name, type, unit, struct code] per
+    field) comes first and again whenever the fields or their types change.
+    VALUES records hold every numeric field packed little-endian with the
+    schema's precompiled struct, then each string field as a uint16 length
+    and UTF-8 bytes. read_binary() turns a stream back into dicts.
+    """
+
+    names: tuple[str, ...] | None
+    pack: Callable[..., bytes] | None
+    fields: list[tuple[str, str]]
+    kinds: list[str]
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.names = None
+        self.pack = None
+        self.fields = []
+        self.kinds = []
+        self.buf += MAGIC
+
+    @staticmethod
+    def code(value) -> str:
+        """
+        struct code for a value, "s" for a string, "j" for anything else
+        """
+        if isinstance(value, bool):
+            ret = "?"
+        elif isinstance(value, int):
+            ret = "q"
+        elif isinstance(value, float):
+            ret = "d"
+        elif isinstance(value, str):
+            ret = "s"
+        elif isinstance(value, (list, tuple)) and value:
+            codes = {BinaryEncoder.code(x) for x in value}
+            if codes <= {"q"}:
+                ret = f"{len(value)}q"
+            elif codes <= {"q", "d"}:
+                ret = f"{len(value)}d"
+            else:
+                ret = "j"
+        else:
+            ret = "j"
+        return ret
+
+    def schema(self, result: dict) -> bytes:
+        self.names = tuple(result)
+        self.fields = [(k, self.code(s.value)) for (k, s) in result.items()]
+        # how values() handles each field: bool, other scalar, list, string
+        # or json
+        kinds = {"?": "b", "s": "s", "j": "j"}
+        self.kinds = [
+            kinds.get(c, "l" if c[0].isdigit() else "n") for (_, c) in self.fields
+        ]
+        numeric = "".join(c for (_, c) in self.fields if c not in ("s", "j"))
+        self.pack = struct.Struct("<" + numeric).pack
+        schema = [
+            [k, s.type, s.unit, c] for ((k, c), s) in zip(self.fields, result.values())
+        ]
+        payload = json.dumps(schema, separators=(",", ":")).encode()
+        return RECORD.pack(len(payload), SCHEMA) + payload
+
+    def values(self, result: dict) -> bytes:
+        numbers = []
+        tail = []
+        for kind, sample in zip(self.kinds, result.values()):
+            value = sample.value
+            if kind == "n":
+                # struct would take a bool for a number and the reader get
+                # back 1 or 0, or any number for "?" and a bool back
+                if value.__class__ is bool:
+                    raise TypeError(f"{value!r} in a numeric field")
+                numbers.append(value)
+            elif kind == "b":
+                if value.__class__ is not bool:
+                    raise TypeError(f"{value!r} in a bool field")
+                numbers.append(value)
+            elif kind == "l":
+                numbers += value
+            else:
+                data = value.encode() if kind == "s" else json.dumps(value).encode()
+                tail += (STRING.pack(len(data)), data)
+        payload = self.pack(*numbers) + b"".join(tail)
+        return RECORD.pack(len(payload), VALUES) + payload
+
+    def encode(self, result: dict) -> bytes:
+        head = b""
+        if tuple(result) != self.names:
+            head = self.schema(result)
+        try:
+            body = self.values(result)
+        except (struct.error, AttributeError, TypeError):
+            # a field changed type since the schema was written
+            head = self.schema(result)
+            body = self.values(result)
+        return head + body
+
+
+def read_binary(stream: BinaryIO) -> Iterator[dict]:
+    """
+    {name: value} for every VALUES record of a --format binary stream
+    """
+    if stream.read(len(MAGIC)) != MAGIC:
+        raise ValueError("not an r3pcomms binary stream")
+    fields = []
+    unpack = None
+    while head := stream.read(RECORD.size):
+        size, kind = RECORD.unpack(head)
+        payload = stream.read(size)
+        if kind == SCHEMA:
+            fields = [(name, code) for (name, _, _, code) in json.loads(payload)]
+            numeric = "".join(c for (_, c) in fields if c not in ("s", "j"))
+            unpack = struct.Struct("<" + numeric)
+            continue
+        numbers = iter(unpack.unpack_from(payload))
+        offset = unpack.size
+        ret = {}
+        for name, code in fields:
+            if code in ("s", "j"):
+                (n,) = STRING.unpack_from(payload, offset)
+                data = payload[offset + STRING.size : offset + STRING.size + n]
+                offset += STRING.size + n
+                ret[name] = data.decode() if code == "s" else json.loads(data)
+            elif code[0].isdigit():
+                ret[name] = tuple(next(numbers) for _ in range(int(code[:-1])))
+            else:
+                ret[name] = next(numbers)
+        yield ret
+
+
+ENCODERS = {
+    "json": Encoder,
+    "ndjson": CompactEncoder,
+    "csv": CSVEncoder,
+    "binary": BinaryEncoder,
+}
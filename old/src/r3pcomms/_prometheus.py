@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+
+import asyncio
+import sys
+import time
+
+from ._async import AsyncR3PComms, ticks
+from ._sample import Sample
+from ._watchdog import ac_live
+
+# field -> (metric, help, labels). loads are reported as positive numbers
+GAUGES = {
+    "Total Load": ("r3p_load_watts", "Power out", {"output": "total"}),
+    "AC Load": ("r3p_load_watts", "Power out", {"output": "ac"}),
+    "DC Load": ("r3p_load_watts", "Power out", {"output": "dc"}),
+    "USB-A Load": ("r3p_load_watts", "Power out", {"output": "usb_a"}),
+    "USB-C Load": ("r3p_load_watts", "Power out", {"output": "usb_c"}),
+    "Total Draw": ("r3p_draw_watts", "Power in", {"input": "total"}),
+    "AC Draw": ("r3p_draw_watts", "Power in", {"input": "ac"}),
+    "Solar/DC Draw": ("r3p_draw_watts", "Power in", {"input": "solar_dc"}),
+    "Temperatures": ("r3p_temperature_celsius", "Temperatures", {}),
+    "Charge Level": ("r3p_charge_level_percent", "State of charge", {}),
+    "Battery Time Remaining": (
+        "r3p_battery_time_remaining_minutes",
+        "Time until empty, -1 when not discharging",
+        {},
+    ),
+    "Remaining Charge Time": (
+        "r3p_charge_time_remaining_minutes",
+        "Time until full, -1 when not charging",
+        {},
+    ),
+    "AC In Live": ("r3p_ac_in_live", "1 while AC input is present", {}),
+    "Design Charge Capacity": ("r3p_design_capacity_mah", "Design capacity", {}),
+}
+LOADS = ("Total Load", "AC Load", "DC Load", "USB-A Load", "USB-C Load")
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _labels(labels: dict[str, str]) -> str:
+    if not labels:
+        return ""
+    inner = ",".join(f'{k}="{_escape(v)}"' for (k, v) in labels.items())
+    return "{" + inner + "}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def listen_address(listen: str) -> tuple[str, int]:
+    """
+    (host, port) from [HOST:]PORT, with IPv6 hosts in brackets
+    """
+    host, _, port = listen.rpartition(":")
+    if host.startswith("[") and host.endswith("]"):
+        host = host[1:-1]
+    elif ":" in host:
+        raise ValueError(f"IPv6 hosts go in brackets, eg. [::1]:9877, not {listen!r}")
+    if not port.isdigit() or not 0 < int(port) < 65536:
+        raise ValueError(f"[HOST:]PORT needs a port number, not {listen!r}")
+    return host, int(port)
+
+
+def render(result: dict, labels: dict[str, str] | None = None) -> str:
+    """
+    a get() style result in the Prometheus text exposition format
+    """
+    labels = labels or {}
+    series = {}  # metric -> (help, [lines])
+    for field, (metric, help, extra) in GAUGES.items():
+        if field not in result:
+            continue
+        value = result[field].value
+        if isinstance(value, (list, tuple)):
+            if field == "Temperatures":
+                values = [({"sensor": str(i)}, x) for (i, x) in enumerate(value)]
+            else:
+                values = [({}, value[0])]
+        else:
+            values = [({}, value)]
+        lines = series.setdefault(metric, (help, []))[1]
+        for more, x in values:
+            x = float(x)
+            if field in LOADS:
+                x = abs(x)
+            lines.append(f"{metric}{_labels(labels | extra | more)} {x!r}")
+    out = []
+    for metric, (help, lines) in series.items():
+        out.append(f"# HELP {metric} {help}")
+        out.append(f"# TYPE {metric} gauge")
+        out.extend(lines)
+    return "\n".join(out) + "\n"
+
+
+class Exporter:
+    """
+    Serves the latest sample of one unit over HTTP for Prometheus to scrape
+
+    The unit is polled every period seconds no matter how often (or if) it
+    is scraped. After each poll the complete HTTP response is rendered once;
+    scrapes only ever write out that cached response, so any number of
+    concurrent scrapes cost no USB traffic.
+    """
+
+    device: AsyncR3PComms
+    period: float
+    host: str
+    port: int
+    labels: dict[str, str]
+    overlap: bool
+    policy: str
+    body: str
+    up: int
+    t: float
+    response: bytes
+    polls: int
+    errors: int
+    scrapes: int
+
+    def __init__(
+        self,
+        device: AsyncR3PComms,
+        period: float = 1.0,
+        host: str = "",
+        port: int = 9877,
+        labels: dict[str, str] | None = None,
+        overlap: bool = False,
+        policy: str = "skip",
+    ) -> None:
+        self.device = device
+        self.period = period
+        self.host = host
+        self.port = port
+        self.labels = labels or {}
+        self.overlap = overlap
+        self.policy = policy
+        self.polls = 0
+        self.errors = 0
+        self.scrapes = 0
+        self.body = ""
+        self.up = 0
+        self.t = 0.0
+        self.response = self.render()
+
+    def render(self) -> bytes:
+        labels = _labels(self.labels)
+        body = (
+            self.body
+            + "# HELP r3p_up 1 if the last poll of the unit worked\n"
+            + "# TYPE r3p_up gauge\n"
+            + f"r3p_up{labels} {self.up}\n"
+            + "# HELP r3p_last_poll_timestamp_seconds When the unit last answered\n"
+            + "# TYPE r3p_last_poll_timestamp_seconds gauge\n"
+            + f"r3p_last_poll_timestamp_seconds{labels} {self.t!r}\n"
+            + "# HELP r3p_poll_errors_total Failed polls\n"
+            + "# TYPE r3p_poll_errors_total counter\n"
+            + f"r3p_poll_errors_total{labels} {self.errors}\n"
+        ).encode()
+        head = (
+            "HTTP/1.1 200 OK\r\n"
+            f"Content-Type: {CONTENT_TYPE}\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            "Connection: close\r\n\r\n"
+        ).encode()
+        return head + body
+
+    def update(self, result: dict | None) -> None:
+        """
+        re-render after a poll, None meaning it failed
+        """
+        if result is None:
+            self.errors += 1
+            self.up = 0
+        else:
+            self.polls += 1
+            self.up = 1
+            self.t = time.time()
+            self.body = render(result, self.labels)
+        self.response = self.render()
+
+    async def poll(self, count: int = 0) -> None:
+        timings = self.device.proto.timings
+        async for _ in ticks(self.period, count, self.policy, timings):
+            try:
+                result = await self.device.get(self.overlap)
+            except (ValueError, OSError) as e:
+                # serial.SerialException is an OSError. either way the unit
+                # is down until a poll works again, which r3p_up reports
+                print(e, file=sys.stderr, flush=True)
+                result = None
+            if result is not None and "Flags" in result:
+                ac = ac_live(result["Flags"].raw)
+                result["AC In Live"] = Sample("d0", ac, ac, "")
+            self.update(result)
+
+    async def handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            request = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), 5.0)
+            path = request.split(b" ", 2)[1] if request.count(b" ") >= 2 else b""
+            if path.split(b"?")[0] in (b"/metrics", b"/"):
+                self.scrapes += 1
+                writer.write(self.response)
+            else:
+                writer.write(
+                    b"HTTP/1.1 404 Not Found\r\nContent-Length: 0\r\n"
+                    b"Connection: close\r\n\r\n"
+                )
+            await writer.drain()
+        except (
+            OSError,
+            asyncio.TimeoutError,
+            asyncio.IncompleteReadError,
+            asyncio.LimitOverrunError,
+        ):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, count: int = 0) -> None:
+        """
+        poll count times (forever when 0) while serving /metrics
+        """
+        server = await asyncio.start_server(self.handle, self.host or None, self.port)
+        async with server:
+            await self.poll(count)
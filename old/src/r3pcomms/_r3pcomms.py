@@ -1,9 +1,31 @@
 #!/usr/bin/env python3
 
-import serial
-import hid
+import math
 import struct
-from operator import xor
+import time
+from collections import deque
+from collections.abc import Iterable, Iterator
+from typing import TYPE_CHECKING
+
+from ._crc import crc16
+from ._devcache import DeviceCache, find_tty
+from ._energy import EnergyMeter
+from ._framer import Framer
+from ._hidraw import HidrawDevice, find_hidraw_devices
+from ._hidraw import available as hidraw_available
+from ._obfuscation import deobfuscate
+from ._record import Recorder
+from ._reportdesc import RIVER3PLUS_DESCRIPTOR, Report, report_map
+from ._sample import Sample
+from ._segments import SEGMENT_DECODERS, SEGMENT_HEADER, UNKNOWN_SEGMENT
+from ._timing import Timings
+
+if TYPE_CHECKING:
+    # the backends are imported only once a channel actually needs them
+    from concurrent.futures import ThreadPoolExecutor
+
+    import hid
+    import serial
 
 
 class R3PComms:
@@ -17,15 +39,70 @@ class R3PComms:
     serial_number: bytes
     held_xdbg: bytes
     held_dbg: bytes
-    s: serial.Serial | None
-    h: hid.device | None
+    s: "serial.Serial | None"
+    h: "hid.device | HidrawDevice | None"
+    hid_backend: str
+    framer: Framer
+    hid_executor: "ThreadPoolExecutor | None"
+    refresh: dict[int | str, float] | None
+    cache: dict[int | str, tuple[bytes, float]]
+    recorder: Recorder | None
+    energy: EnergyMeter | None
+    timings: Timings | None
     hid_path: str
-
-    def __init__(self, comport: str = "", hiddev: str = "", debug: int = 0) -> None:
+    # feature report ID -> its length and field layout, from the HID
+    # device's report descriptor when connected
+    layouts: dict[int, Report]
+    # serial requests allowed in flight at once. each gets the port's read
+    # timeout (s.timeout) to be answered in
+    depth: int
+    # sequence number -> (reply deadline, timeout, request) for requests in
+    # flight
+    pending: dict[int, tuple[float, float, str]]
+    # sequence number -> (expiry, reply) for replies not yet collected by
+    # receive(), None for those given up on. they're kept for one more timeout
+    replies: dict[int, tuple[float, bytes | None]]
+    lost: dict[int, str]
+
+    # when set, where find_hid_device() and resolve_comport() remember
+    # what they found
+    device_cache: DeviceCache | None = None
+
+    serial_msg = "f40d00000000ffff2202010166031600"
+    metrics_msg = "de2d00000000ffff220201016602"
+    # feature reports hid_get() reads, each at its length in layouts (16
+    # bytes for any the descriptor doesn't declare)
+    hid_reports = (12, 17, 13, 11, 18, 19, 1, 7)
+
+    # seconds between reads for schedule(), IDs as in hid_reports
+    refresh_defaults: dict[int | str, float] = {
+        7: 0.0,  # Flags
+        12: 10.0,  # Charge Level
+        13: 10.0,  # Battery Time Remaining
+        11: 10.0,
+        1: math.inf,
+        17: math.inf,
+        18: math.inf,
+        19: math.inf,
+        "metrics": 0.0,
+        "serial": math.inf,
+    }
+
+    def __init__(
+        self,
+        comport: str = "",
+        hiddev: str = "",
+        debug: int = 0,
+        hid_backend: str = "auto",
+    ) -> None:
         self.sequence_num = 0
         self.debug_prints = debug
+        self.hid_backend = R3PComms.resolve_hid_backend(hid_backend)
 
         if comport:
+            import serial
+
+            comport = R3PComms.resolve_comport(comport)
             comms_args = {
                 "port": None,
                 "baudrate": 115200,
@@ -39,13 +116,17 @@ class R3PComms:
         else:
             self.s = None
 
-        if hiddev:
+        if hiddev.startswith("/dev/"):
+            # an already known device node, eg. from find_hid_devices()
+            self.hid_path = hiddev.encode()
+            self.h = self.new_hid_device()
+        elif hiddev:
             vid, pid = hiddev.split(":")
             vid = int(vid, 16)
             pid = int(pid, 16)
             self.hid_path = self.find_hid_device(pid, vid)
             if self.hid_path:
-                self.h = hid.device()
+                self.h = self.new_hid_device()
                 if self.debug_prints >= 2:
                     print(f"Found HID device: {self.hid_path}")
             else:
@@ -60,17 +141,38 @@ class R3PComms:
         self.redact_sn = True
         self.held_xdbg = b""
         self.held_dbg = b""
+        self.framer = Framer()
+        self.hid_executor = None
+        self.refresh = None
+        self.cache = {}
+        self.recorder = None
+        self.energy = None
+        self.timings = None
+        self.layouts = report_map(RIVER3PLUS_DESCRIPTOR)
+        self.depth = 1
+        self.pending = {}
+        self.replies = {}
+        self.lost = {}
 
     def __enter__(self):
+        self.cache = {}
         if self.s:
             self.sequence_num = 0
+            self.framer.reset()
+            self.pending = {}
+            self.replies = {}
+            self.lost = {}
             self.s.open()
         if self.h:
             self.h.open_path(self.hid_path)
+            self.layouts = report_map(self.read_descriptor())
 
         return self
 
     def __exit__(self, type, value, traceback):
+        if self.hid_executor:
+            self.hid_executor.shutdown(wait=True)
+            self.hid_executor = None
         if self.h:
             self.h.close()
         if self.s:
@@ -82,11 +184,77 @@ class R3PComms:
 
     def find_hid_device(self, pid: str, vid: str) -> str | None:
         ret = None
-        devices = hid.enumerate()
-        for device in devices:
-            if device["vendor_id"] == vid and device["product_id"] == pid:
-                if "hidraw" in device["path"].decode("utf-8"):
-                    ret = device["path"]
+        cache = R3PComms.device_cache
+        key = f"hid:{vid:04x}:{pid:04x}"
+        if cache and (path := cache.get(key)):
+            ret = path.encode()
+        else:
+            paths = R3PComms.find_hid_devices(pid, vid, self.hid_backend)
+            if paths:
+                ret = paths[-1]
+                if cache and ret.startswith(b"/dev/"):
+                    cache.put(key, ret.decode())
+        return ret
+
+    @staticmethod
+    def resolve_comport(comport: str) -> str:
+        """
+        comport, or for "sn:SERIALNUMBER" the ttyACM of the unit with that
+        USB serial number
+        """
+        ret = comport
+        if comport.startswith("sn:"):
+            cache = R3PComms.device_cache
+            key = f"tty:{comport[3:]}"
+            if cache and (path := cache.get(key)):
+                ret = path
+            else:
+                paths = find_tty(comport[3:])
+                if not paths:
+                    raise ValueError(f"No serial port found for {comport}")
+                # the unit's CDC data interface is the later one
+                ret = paths[-1]
+                if cache:
+                    cache.put(key, ret)
+        return ret
+
+    @staticmethod
+    def find_hid_devices(pid: int, vid: int, backend: str = "auto") -> list[bytes]:
+        """
+        hidraw paths of every attached device matching vid:pid
+        """
+        ret = []
+        if R3PComms.resolve_hid_backend(backend) == "hidraw":
+            ret = [path.encode() for path in find_hidraw_devices(pid, vid)]
+        else:
+            import hid
+
+            devices = hid.enumerate()
+            for device in devices:
+                if device["vendor_id"] == vid and device["product_id"] == pid:
+                    if "hidraw" in device["path"].decode("utf-8"):
+                        ret.append(device["path"])
+        return ret
+
+    @staticmethod
+    def resolve_hid_backend(backend: str = "auto") -> str:
+        """
+        "hidraw" (direct ioctls, Linux only) or "hidapi"; "auto" picks hidraw
+        whenever it's usable
+        """
+        if backend == "auto":
+            backend = "hidraw" if hidraw_available() else "hidapi"
+        elif backend not in ("hidraw", "hidapi"):
+            raise ValueError(f"Unknown HID backend {backend}")
+        return backend
+
+    def new_hid_device(self) -> "hid.device | HidrawDevice":
+        if self.hid_backend == "hidraw":
+            ret = HidrawDevice()
+        else:
+            import hid
+
+            ret = hid.device()
         return ret
 
     @staticmethod
@@ -94,56 +262,83 @@ class R3PComms:
         """
         CRC-16/ARC
         """
-        offset = 0
-        length = len(data)
-        crc = 0x0000
-        for i in range(length):
-            crc ^= data[offset + i]
-            for j in range(8):
-                if (crc & 0x1) == 1:
-                    crc = int((crc / 2)) ^ 40961
-                else:
-                    crc = int(crc / 2)
-        return crc & 0xFFFF
+        return crc16(data)
+
+    def frame(self, msg: str) -> bytes:
+        """
+        wrap msg for the wire, consuming a sequence number
+        """
+        overhead_len = 14
+        start = 0x03AA
+
+        bmsg = bytes.fromhex(msg)
+        msg_len = len(bmsg) - overhead_len
+        bsequence = struct.pack("<I", self.sequence_num)
+        bmsg_seq = bmsg[:2] + bsequence + bmsg[6:]
+        headmsg = struct.pack("<HH", start, msg_len) + bmsg_seq
+        crc_val = R3PComms.crc16(headmsg)
+        out = headmsg + struct.pack("<H", crc_val)
+        if self.debug_prints >= 1:
+            print(f">s> {out.hex()}")
+        if self.recorder:
+            self.recorder.tx(out, self.sequence_num)
+        self.sequence_num += 1
+        return out
 
     def tx(self, msg: str) -> int | None:
         if self.s:
-            overhead_len = 14
-            start = 0x03AA
-
-            bmsg = bytes.fromhex(msg)
-            msg_len = len(bmsg) - overhead_len
-            bsequence = struct.pack("<I", self.sequence_num)
-            bmsg_seq = bmsg[:2] + bsequence + bmsg[6:]
-            headmsg = struct.pack("<HH", start, msg_len) + bmsg_seq
-            crc_val = R3PComms.crc16(headmsg)
-            out = headmsg + struct.pack("<H", crc_val)
-            if self.debug_prints >= 1:
-                print(f">s> {out.hex()}")
-            ret = self.s.write(out)
-            self.sequence_num += 1
+            frame = self.frame(msg)
+            if self.timings:
+                t0 = time.monotonic_ns()
+                ret = self.s.write(frame)
+                self.timings.add("tx", time.monotonic_ns() - t0)
+                self.timings.count("tx_bytes", len(frame))
+            else:
+                ret = self.s.write(frame)
         else:
             ret = None
         return ret
 
     def rx(self) -> bytes | None:
+        """
+        next CRC-valid frame (minus its CRC), None on timeout
+        """
         ret = None
         if self.s:
-            header_len = 4
-            base_len = 20
-
-            header = self.s.read(header_len)
-            preamble, var_len = struct.unpack("<HH", header)
-            payload = self.s.read(base_len + var_len - header_len - 2)
-            crc = self.s.read(2)
-            full_message = header + payload + crc
-            if R3PComms.crc16(full_message) == 0:
-                if self.debug_prints >= 1:
-                    self.debug_print(full_message)
-            else:
-                # TODO: gracefully handle this
-                raise RuntimeError("CRC check fail")
-            ret = header + payload
+            timings = self.timings
+            if timings:
+                t0 = time.monotonic_ns()
+            while (ret := self.next_frame()) is None:
+                # whatever has arrived in one read, or block for the first byte
+                chunk = self.s.read(self.s.in_waiting or 1)
+                if not chunk:
+                    break
+                if timings:
+                    timings.count("rx_bytes", len(chunk))
+                self.framer.feed(chunk)
+            if timings:
+                timings.add("rx", time.monotonic_ns() - t0)
+                if ret is None:
+                    timings.count("timeouts")
+        return ret
+
+    def next_frame(self) -> bytes | None:
+        """
+        next CRC-valid frame (minus its CRC) already buffered in the framer
+        """
+        ret = None
+        if self.timings:
+            t0 = time.monotonic_ns()
+            frame = next(self.framer.frames(), None)
+            self.timings.add("crc", time.monotonic_ns() - t0)
+        else:
+            frame = next(self.framer.frames(), None)
+        if frame is not None:
+            if self.debug_prints >= 1:
+                self.debug_print(bytes(frame))
+            if self.recorder:
+                self.recorder.rx(frame)
+            ret = bytes(frame[:-2])
         return ret
 
     @staticmethod
@@ -157,8 +352,7 @@ class R3PComms:
             obfuscated = data[obfuscattion_offset:]
             sequence_num = R3PComms.get_sequencenum(not_obfuscated)
 
-        deobfuscated = bytes([xor(x, sequence_num) & 0xFF for x in obfuscated])
-        return not_obfuscated + deobfuscated
+        return bytes(not_obfuscated) + deobfuscate(obfuscated, sequence_num)
 
     @staticmethod
     def get_sequencenum(data: bytes) -> int:
@@ -169,62 +363,18 @@ class R3PComms:
         offset = 0
         ssize = len(source)
         result = {}
+        seen = {}
+        decoders = SEGMENT_DECODERS
+        header = SEGMENT_HEADER
         while offset < ssize:
-            seg_type, seg_len = struct.unpack_from("<HB", source, offset=offset)
+            seg_type, seg_len = header.unpack_from(source, offset)
             seg_data = source[offset + 3 : offset + 3 + seg_len]
             offset += 3 + seg_len
-            if seg_type == 3:
-                name = "Design Charge Capacity"
-                seg_val = struct.unpack("<I", seg_data)[0]
-                unit = "mAh"
-            elif seg_type == 4:
-                name = "Temperatures"
-                seg_val = struct.unpack("<BBBB", seg_data)
-                # the second one is for the battery
-                unit = "degC"
-            elif seg_type == 7:
-                name = "Total Load"
-                seg_val = struct.unpack("f", seg_data)[0]
-                unit = "W"
-            elif seg_type == 8:
-                name = "Total Draw"
-                seg_val = struct.unpack("f", seg_data)[0]
-                unit = "W"
-            elif seg_type == 9:
-                name = "AC Draw"
-                seg_val = struct.unpack("f", seg_data)[0]
-                unit = "W"
-            elif seg_type == 12:
-                name = "Solar/DC Draw"
-                seg_val = struct.unpack("f", seg_data)[0]
-                unit = "W"
-            elif seg_type == 13:
-                name = "Line Frequency?"
-                seg_val = struct.unpack("<L", seg_data)[0] / 10
-                unit = "Hz"
-            elif seg_type == 14:
-                name = "AC Load"
-                seg_val = struct.unpack("f", seg_data)[0] * -1
-                unit = "W"
-            elif seg_type == 15:
-                name = "AC Load Frequency?"
-                seg_val = struct.unpack("<HH", seg_data)
-                unit = "Hz"
-            elif seg_type == 16:
-                name = "DC Load"
-                seg_val = struct.unpack("f", seg_data)[0] * -1
-                unit = "W"
-            elif seg_type == 17:
-                name = "USB-A Load"
-                seg_val = struct.unpack("f", seg_data)[0] * -1
-                unit = "W"
-            elif seg_type == 18:
-                name = "USB-C Load"
-                seg_val = struct.unpack("f", seg_data)[0] * -1
-                unit = "W"
-            elif seg_type == 22:
-                name = "Serial Num"
-                seg_val = struct.unpack(f"{seg_len}s", seg_data)[0]
+            decoder = decoders.get(seg_type, UNKNOWN_SEGMENT)
+            name = decoder.name
+            unit = decoder.unit
+            if seg_type == 22:
+                seg_val = bytes(seg_data)
                 self.serial_number = seg_val
                 if self.debug_print:
                     if self.held_dbg:
@@ -238,58 +388,142 @@ class R3PComms:
                     seg_data = bytes.fromhex("ff") * len(self.serial_number)
                 else:
                     seg_val = seg_val.decode()
-                unit = ""
-            elif seg_type == 23:
-                name = "Remaining Charge Time"
-                unpacked = struct.unpack("<HH", seg_data)
-                if seg_data[:2] == bytes.fromhex("3317"):
-                    # 0x3317 means the battery is not charging?
-                    seg_val = -1
-                else:
-                    seg_val = unpacked
-                # seg_val = tuple([x / 60 for x in seg_val])
-                unit = "min"
-                # unit = "Hr"
-            elif seg_type == 25:
-                name = "Model/Mfg. Batch/Date?"
-                seg_val = seg_data.hex()
-                unit = "?"
             else:
-                name = "unknown-s"
-                seg_val = struct.unpack("<HH", seg_data)
-                unit = "?"
-            i = 0
-            last_name = name
-            while name in result:
-                name = f"{last_name}{i}"
-                i += 1
-            result[name] = {
-                "type": f"s{seg_type}",
-                "data": "0x" + seg_data.hex(),
-                "value": seg_val,
-                "unit": unit,
-            }
+                seg_val = decoder.decode(seg_data)
+            n = seen.get(name)
+            if n is None:
+                seen[name] = 0
+            else:
+                seen[name] = n + 1
+                name = f"{name}{n}"
+            result[name] = Sample(f"s{seg_type}", seg_data, seg_val, unit)
         return result
 
     def query(self, msg: str) -> bytes:
+        return self.receive(self.send(msg))
+
+    def query_many(self, msgs: Iterable[str]) -> list[bytes]:
+        """
+        replies to every msg, with up to depth of them in flight at once
+        """
+        return [self.receive(seq) for seq in [self.send(msg) for msg in msgs]]
+
+    def send(self, msg: str) -> int:
+        """
+        transmit msg without waiting for its reply, once fewer than depth
+        requests are in flight. returns the sequence number to receive() it by
+        """
+        while len(self.pending) >= self.depth:
+            self.route()
+        seq = self.sequence_num
         self.tx(msg)
-        rx = self.rx()
-        if rx is None:
-            raise ValueError(f"Failure getting response to {msg}")
-        return rx
+        timeout = self.s.timeout if self.s else 0.0
+        self.pending[seq] = (time.monotonic() + timeout, timeout, msg)
+        return seq
+
+    def receive(self, seq: int) -> bytes:
+        """
+        the reply to the request sent with sequence number seq, reading and
+        routing other replies meanwhile
+        """
+        while seq not in self.replies:
+            if seq not in self.pending:
+                raise KeyError(seq)
+            self.route()
+        if (reply := self.replies.pop(seq)[1]) is None:
+            raise ValueError(f"Failure getting response to {self.lost.pop(seq)}")
+        return reply
+
+    def route(self) -> None:
+        """
+        read the next reply (or time out) and file it under its request's
+        sequence number. requests past their deadline are given up on,
+        replies that no request is waiting for any more are dropped, and so
+        are replies nobody collected within another timeout (eg. from an
+        abandoned metrics() generator)
+        """
+        self.file_reply(self.rx())
 
-    def read_raw_report(self, report_id, length=16) -> bytes | None:
+    def file_reply(self, frame: bytes | None) -> None:
+        """
+        route()'s bookkeeping for a frame read (or None on timeout) by
+        whichever means
+        """
+        now = time.monotonic()
+        if frame is not None:
+            seq = R3PComms.get_sequencenum(frame)
+            if (request := self.pending.pop(seq, None)) is not None:
+                self.replies[seq] = (now + request[1], frame)
+            elif self.timings:
+                self.timings.count("stale_replies")
+        for seq, (deadline, timeout, msg) in list(self.pending.items()):
+            if deadline <= now:
+                del self.pending[seq]
+                self.replies[seq] = (now + timeout, None)
+                self.lost[seq] = msg
+        for seq, (expiry, _) in list(self.replies.items()):
+            if expiry <= now:
+                del self.replies[seq]
+                self.lost.pop(seq, None)
+                if self.timings:
+                    self.timings.count("uncollected_replies")
+
+    def metrics(self, count: int = 0) -> Iterator[dict]:
+        """
+        decoded metrics replies back to back (forever when count is 0),
+        keeping up to depth queries in flight so the next one is already
+        on the wire while a reply is decoded
+        """
+        inflight = deque()
+        sent = 0
+        while True:
+            while len(inflight) < self.depth and (not count or sent < count):
+                inflight.append(self.send(self.metrics_msg))
+                sent += 1
+            if not inflight:
+                break
+            yield self.decode_metrics(self.receive(inflight.popleft()))
+
+    def read_descriptor(self) -> bytes:
+        """
+        the open HID device's report descriptor, or RIVER3PLUS_DESCRIPTOR when
+        the backend can't read it (eg. hidapi before 0.14)
+        """
+        ret = b""
+        try:
+            ret = bytes(self.h.get_report_descriptor())
+        except (AttributeError, OSError, ValueError) as e:
+            if self.debug_prints >= 2:
+                print(f"Using the built-in report descriptor: {e}")
+        return ret or RIVER3PLUS_DESCRIPTOR
+
+    def report_length(self, report_id: int) -> int:
+        layout = self.layouts.get(report_id)
+        return layout.length if layout else 16
+
+    def read_raw_report(self, report_id, length=None) -> bytes | None:
+        if length is None:
+            length = self.report_length(report_id)
         if self.h:
             try:
                 if self.debug_prints >= 1:
                     dbg_out = (report_id.to_bytes(1), length.to_bytes(1))
                     print(f">h> {dbg_out[0].hex()}{dbg_out[1].hex()}")
-                data = self.h.get_feature_report(report_id, length)
+                if self.timings:
+                    t0 = time.monotonic_ns()
+                    data = self.h.get_feature_report(report_id, length)
+                    self.timings.add(f"hid{report_id}", time.monotonic_ns() - t0)
+                else:
+                    data = self.h.get_feature_report(report_id, length)
                 data = bytes(data)
                 if self.debug_prints >= 1:
                     print(f"<h< {data.hex()}")
+                if self.recorder:
+                    self.recorder.hid(report_id, data)
                 ret = data
             except Exception as e:
+                if self.timings:
+                    self.timings.count("hid_errors")
                 raise ValueError(f"Failure reading report {report_id}: {e}")
         else:
             ret = None
@@ -297,81 +531,214 @@ class R3PComms:
         return ret
 
     def get_serial(self) -> dict:
+        now = time.monotonic()
+        if cached := self.cached("serial", now):
+            answer, t = cached
+        else:
+            answer = self.query(self.serial_msg)
+            t = time.monotonic()
+            self.store("serial", answer, t)
+        result = self.decode_serial(answer)
+        if self.refresh is not None:
+            self.stamp(result, {}, t)
+        return result
+
+    def decode_serial(self, answer: bytes) -> dict:
         serial_answer_offset = 19
-        answer = self.query("f40d00000000ffff2202010166031600")
-        serial_result = self.serial_segmenter(answer[serial_answer_offset:])
+        if self.timings:
+            t0 = time.monotonic_ns()
+            serial_result = self.serial_segmenter(answer[serial_answer_offset:])
+            self.timings.add("segments", time.monotonic_ns() - t0)
+        else:
+            serial_result = self.serial_segmenter(answer[serial_answer_offset:])
         return serial_result
 
-    def ser_get(self) -> dict:
+    def ser_get(self, stamp: bool = False) -> dict:
+        now = time.monotonic()
+        if cached := self.cached("metrics", now):
+            answer, t = cached
+        else:
+            answer = self.query(self.metrics_msg)
+            t = time.monotonic()
+            self.store("metrics", answer, t)
+        result = self.decode_metrics(answer)
+        if stamp or self.refresh is not None:
+            self.stamp(result, {}, t)
+        return result
+
+    def decode_metrics(self, answer: bytes) -> dict:
         metrics_answer_offset = 22
-        answer = self.query("de2d00000000ffff220201016602")
+        timings = self.timings
+        if timings:
+            t0 = time.monotonic_ns()
         xanswer = R3PComms.xorit(answer)
+        if timings:
+            t1 = time.monotonic_ns()
+            timings.add("xorit", t1 - t0)
         if self.debug_prints >= 1:
             self.debug_print(xanswer, xord=True)
         metrics_result = self.serial_segmenter(xanswer[metrics_answer_offset:])
-        metrics_result["preamble?"] = {
-            "type": "pre",
-            "data": xanswer[:metrics_answer_offset].hex(),
-            "value": 0,
-            "unit": "",
-        }
+        if timings:
+            timings.add("segments", time.monotonic_ns() - t1)
+        preamble = xanswer[:metrics_answer_offset].hex()
+        metrics_result["preamble?"] = Sample("pre", preamble, 0, "")
 
         return metrics_result
 
-    def get(self) -> dict:
+    def get(self, overlap: bool = False) -> dict:
+        """
+        all the metrics the open channels provide
+
+        With overlap, the HID reports are read on a worker thread while the
+        serial query is in flight, every field is stamped with the
+        time.monotonic() it was acquired at and the serial, HID and total
+        acquisition latencies are added as extra fields.
+        """
         metrics = {}
-        if self.s:
-            metrics |= self.ser_get()
-        if self.h:
-            metrics |= self.hid_get()
+        if overlap:
+            t0 = time.monotonic()
+            hid_job = None
+            if self.h:
+                if self.hid_executor is None:
+                    from concurrent.futures import ThreadPoolExecutor
+
+                    self.hid_executor = ThreadPoolExecutor(max_workers=1)
+                hid_job = self.hid_executor.submit(self.hid_get, stamp=True)
+            if self.s:
+                metrics |= self.ser_get(stamp=True)
+                dt = time.monotonic() - t0
+                metrics["Serial Latency"] = Sample("i5", dt, dt, "s")
+            if hid_job:
+                hid_metrics = hid_job.result()
+                metrics |= hid_metrics
+                dt = max([t0] + [x.t for x in hid_metrics.values()]) - t0
+                metrics["HID Latency"] = Sample("i6", dt, dt, "s")
+            dt = time.monotonic() - t0
+            metrics["Total Latency"] = Sample("i7", dt, dt, "s")
+        else:
+            if self.s:
+                metrics |= self.ser_get()
+            if self.h:
+                metrics |= self.hid_get()
+        if self.energy:
+            self.energy.update(metrics)
         return metrics
 
-    def hid_get(self) -> dict:
-        result = {}
-        to_read = (12, 17, 13, 11, 18, 19, 1, 7)
-        # to_read.append((12, 16))  # Cnst,Var,Abs,Vol
-        # to_read.append((17, 16))  # Data,Var,Abs,NoPref,Vol
-        # to_read.append((13, 16))  # Cnst,Var,Abs,NoPref,Vol
-        # to_read.append((11, 16))  # Cnst,Var,Abs,NoPref
-        # to_read.append((18, 16))  # Data,Var,Abs,NoPref,Vol
-        # to_read.append((19, 16))  # Data,Var,Abs,NoPref,Vol
-        # to_read.append((1,  128))  # Cnst,Var,Abs,Vol
-        # to_read.append((7,  1))  #
-        for rid in to_read:
+    def read_reports(
+        self, report_ids: Iterable[int]
+    ) -> list[tuple[int, bytes | None, float]]:
+        """
+        (report ID, data, time.monotonic() read at) for each report ID, read
+        back to back
+        """
+        ret = []
+        for rid in report_ids:
             data = self.read_raw_report(rid)
+            ret.append((rid, data, time.monotonic()))
+        return ret
+
+    def due_reports(self) -> tuple[dict, dict, list[int]]:
+        """
+        the cached hid_reports still fresh ({ID: data}, {type: time}) and
+        the IDs to read again
+        """
+        now = time.monotonic()
+        reports = {}
+        stamps = {}
+        due = []
+        for rid in self.hid_reports:
+            if cached := self.cached(rid, now):
+                reports[rid], stamps[f"h{rid}"] = cached
+            else:
+                due.append(rid)
+        return reports, stamps, due
+
+    def hid_get(self, stamp: bool = False) -> dict:
+        reports, stamps, due = self.due_reports()
+        for rid, data, t in self.read_reports(due):
+            self.store(rid, data, t)
+            reports[rid] = data
+            stamps[f"h{rid}"] = t
+        result = self.decode_reports((rid, reports[rid]) for rid in self.hid_reports)
+        if stamp or self.refresh is not None:
+            self.stamp(result, stamps)
+        return result
+
+    def instrument(self, on: bool = True) -> None:
+        """
+        start (afresh) or stop keeping the latency histograms and counters
+        that stats() reports. Off, the hot paths skip them entirely
+        """
+        self.timings = Timings() if on else None
+
+    def stats(self) -> dict:
+        """
+        per phase latency summaries (tx, rx, crc, xorit, segments, hidN...)
+        and byte/frame/error counters, since instrument() was called
+        """
+        ret = {"phases": {}, "counters": {}}
+        if self.timings:
+            ret = self.timings.stats()
+        ret["counters"] |= self.framer.stats()
+        return ret
+
+    def schedule(self, refresh: dict[int | str, float] | None = None) -> None:
+        """
+        read each HID report ID and serial query ("metrics", "serial") only
+        every refresh[key] seconds, handing out cached values in between.
+        unlisted keys use refresh_defaults, unknown ones are read every time.
+        math.inf means once per connection
+        """
+        self.refresh = self.refresh_defaults | (refresh or {})
+        self.cache = {}
+
+    def cached(self, key: int | str, now: float) -> tuple[bytes, float] | None:
+        """
+        the cached (data, acquisition time) for key if it's still fresh
+        """
+        ret = None
+        if self.refresh is not None and key in self.cache:
+            data, t = self.cache[key]
+            if now - t < self.refresh.get(key, 0.0):
+                ret = data, t
+        return ret
+
+    def store(self, key: int | str, data: bytes | None, t: float) -> None:
+        if self.refresh is not None and data:
+            self.cache[key] = (data, t)
+
+    def stamp(self, result: dict, stamps: dict[str, float], t: float = 0.0) -> None:
+        """
+        set each sample's acquisition time (by type, else t), and its age
+        when scheduling is on
+        """
+        now = time.monotonic()
+        for sample in result.values():
+            sample.t = stamps.get(sample.type, t)
+            if self.refresh is not None:
+                sample.age = now - sample.t
+
+    def decode_reports(self, reports: Iterable[tuple[int, bytes | None]]) -> dict:
+        """
+        every field of each (report ID, data) as its layout has it. reports
+        the descriptor doesn't declare come as one hex string
+        """
+        result = {}
+        for rid, data in reports:
             if data:
                 payload = data[1:]
-                if rid == 7:
-                    name = "Flags"
-                    rpt_val = "0b" + "".join([f"{x:08b}" for x in payload])
-                    unit = ""
-                elif rid == 12:
-                    name = "Charge Level"
-                    rpt_val = payload[0]
-                    unit = "%"
-                elif rid == 13:
-                    name = "Battery Time Remaining"
-                    if payload == bytes.fromhex("3317"):
-                        # I geuss 0x3317 means the battery is not discharging
-                        rpt_val = -1
-                    else:
-                        rpt_val = struct.unpack("<H", payload)
-                    unit = "min"
+                layout = self.layouts.get(rid)
+                if layout:
+                    fields = layout.decode(payload)
                 else:
-                    name = "unknown-h"
-                    rpt_val = payload.hex()
-                    unit = "?"
-                i = 0
-                last_name = name
-                while name in result:
-                    name = f"{last_name}{i}"
-                    i += 1
-                result[name] = {
-                    "type": f"h{rid}",
-                    "data": "0x" + payload.hex(),
-                    "value": rpt_val,
-                    "unit": unit,
-                }
+                    fields = [("unknown-h", payload, payload.hex(), "?")]
+                for name, raw, rpt_val, unit in fields:
+                    i = 0
+                    last_name = name
+                    while name in result:
+                        name = f"{last_name}{i}"
+                        i += 1
+                    result[name] = Sample(f"h{rid}", raw, rpt_val, unit)
 
         return result
 
@@ -381,7 +748,7 @@ class R3PComms:
         else:
             prompt = "<s< "
 
-        if self.redact_sn and serial:
+        if self.redact_sn:
             if self.serial_number:
                 if xord:
                     to_redact = self.serial_number
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+
+import contextlib
+import mmap
+import os
+import struct
+import threading
+import time
+from collections.abc import Iterator
+
+MAGIC = b"R3PREC01"
+# kind, time.monotonic(), sequence number (TX/RX) or report ID (HID), length
+RECORD = struct.Struct("<BdIH")
+TX = 0  # serial frame sent, with its CRC
+RX = 1  # CRC-valid serial frame received, with its CRC
+HID = 2  # feature report as read, report ID first
+
+
+class Recorder:
+    """
+    Appends every raw serial frame and HID feature report to a file
+
+    Each entry is a RECORD header followed by the raw bytes. Writes go
+    through one large buffer and a lock, since in overlap mode HID reports
+    are read on a worker thread.
+    """
+
+    path: str
+    f: object
+    lock: threading.Lock
+
+    def __init__(self, path: str, buffering: int = 1 << 16) -> None:
+        self.path = path
+        self.f = open(path, "ab", buffering=buffering)
+        if self.f.tell() == 0:
+            self.f.write(MAGIC)
+        self.lock = threading.Lock()
+
+    @classmethod
+    def maybe(cls, path: str | None) -> "Recorder | contextlib.nullcontext":
+        """
+        a Recorder for path, or a context manager giving None without one
+        """
+        return cls(path) if path else contextlib.nullcontext()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
+
+    def close(self) -> None:
+        if not self.f.closed:
+            self.f.close()
+
+    def write(self, kind: int, tag: int, data: bytes | memoryview) -> None:
+        head = RECORD.pack(kind, time.monotonic(), tag, len(data))
+        with self.lock:
+            self.f.write(head)
+            self.f.write(data)
+
+    def tx(self, frame: bytes, sequence_num: int) -> None:
+        self.write(TX, sequence_num, frame)
+
+    def rx(self, frame: bytes | memoryview) -> None:
+        (sequence_num,) = struct.unpack_from("<I", frame, 6)
+        self.write(RX, sequence_num, frame)
+
+    def hid(self, report_id: int, data: bytes) -> None:
+        self.write(HID, report_id, data)
+
+
+def read_records(path: str) -> Iterator[tuple[int, float, int, bytes]]:
+    """
+    (kind, time, sequence number or report ID, raw bytes) of every entry,
+    stopping quietly at a truncated last one
+    """
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size < len(MAGIC):
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+            if m[: len(MAGIC)] != MAGIC:
+                raise ValueError(f"{path} is not an r3pcomms recording")
+            view = memoryview(m)
+            try:
+                pos = len(MAGIC)
+                end = len(m)
+                while pos + RECORD.size <= end:
+                    kind, t, tag, length = RECORD.unpack_from(view, pos)
+                    pos += RECORD.size
+                    if pos + length > end:
+                        break
+                    yield kind, t, tag, bytes(view[pos : pos + length])
+                    pos += length
+            finally:
+                view.release()
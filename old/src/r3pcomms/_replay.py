@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+
+import time
+from collections.abc import Iterator
+
+from ._r3pcomms import R3PComms
+from ._record import HID, RX, TX, read_records
+
+
+def replay(
+    path: str, speed: float = 0.0, comms: R3PComms | None = None
+) -> Iterator[dict]:
+    """
+    get() style results decoded from a recording
+
+    Serial frames go back through the framer (CRC check included) and
+    everything through the same decode methods a live unit's data does.
+    Consecutive frames and reports are grouped into one result until a
+    query or report ID repeats; serial number queries are results of their
+    own. speed 0 means as fast as possible, 1.0 at the pace it was
+    recorded, 2.0 twice that, etc.
+    """
+    d = comms or R3PComms()
+    serial_cmd = bytes.fromhex(d.serial_msg)[:2]
+    sent = {}  # sequence number -> command of the frame sent with it
+    group = {}
+    t_first = None
+    start = time.monotonic()
+    for kind, t, tag, data in read_records(path):
+        if kind == TX:
+            sent[tag] = data[4:6]
+            continue
+        elif kind == RX:
+            d.framer.feed(data)
+            data = d.next_frame()
+            if data is None:
+                continue
+            key = "serial" if sent.pop(tag, None) == serial_cmd else "metrics"
+        elif kind == HID:
+            key = tag
+        else:
+            continue
+        if t_first is None:
+            t_first = t
+        if key in group or "serial" in group or (key == "serial" and group):
+            # get() never includes the serial query, that's get_serial()
+            yield decode_group(d, group)
+            group = {}
+        if speed > 0:
+            delay = start + (t - t_first) / speed - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+        group[key] = data
+    if group:
+        yield decode_group(d, group)
+
+
+def decode_group(d: R3PComms, group: dict[int | str, bytes]) -> dict:
+    result = {}
+    if "serial" in group:
+        result |= d.decode_serial(group["serial"])
+    if "metrics" in group:
+        result |= d.decode_metrics(group["metrics"])
+    reports = [(k, v) for (k, v) in group.items() if isinstance(k, int)]
+    if reports:
+        result |= d.decode_reports(reports)
+    return result
@@ -0,0 +1,392 @@
+#!/usr/bin/env python3
+
+import functools
+import struct
+from collections.abc import Callable
+from typing import Any
+
+# what a River 3 Plus hands out (data/river3plus.rd.hex.txt), for when the
+# HID backend can't read the descriptor and for decoding recordings. the
+# firmware leaves out the last Feature item and three End Collections (see
+# hid_fixes/r3p_rd_patch.c), which parse_descriptor() doesn't mind
+RIVER3PLUS_DESCRIPTOR = bytes.fromhex(
+    "05840904a1010584091ea184094485017510950127ffff00006621d15507b183"
+    "c00924a10275089501150026ff0005858506098bb123851f09897904b1238520"
+    "098f7905b1238516092cb1238510098d266400b1228518098eb123850e0967b1"
+    "8385170983b183850c096681a30966b1a3850f098cb1a285110929b1a2850909"
+    "85751027ffff0000b1a3851a096a27ffff00006601105500b1a3851c096981a3"
+    "0969b1a3850d096881a30968b1a38508092a751027640500001678008122092a"
+    "b1a205848512095716008027ff7f0000b1a285130955b1a2850a0940150027ff"
+    "ff00006721d1f0005505b123850b093081a30930b1a38514095a750815012503"
+    "650055008122095ab1a20902a10285070585094475011500250181a30944b1a3"
+    "094581a30945b1a309d081a309d0b1a309d181a309d1b1a3094281a30942b1a3"
+    "094381a20943b1a2094b81a3094bb1a309db81a309dbb1a3094681a30946b1a3"
+    "094781a30947b1a30584096881a20968b1a2096981a30969"
+)
+
+# short item prefixes without their size bits
+INPUT, OUTPUT, FEATURE = 0x80, 0x90, 0xB0
+COLLECTION, END_COLLECTION = 0xA0, 0xC0
+USAGE_PAGE, LOGICAL_MIN, LOGICAL_MAX = 0x04, 0x14, 0x24
+UNIT_EXPONENT, UNIT, REPORT_SIZE = 0x54, 0x64, 0x74
+REPORT_ID, REPORT_COUNT, PUSH, POP = 0x84, 0x94, 0xA4, 0xB4
+USAGE, USAGE_MIN, USAGE_MAX = 0x08, 0x18, 0x28
+LONG_ITEM = 0xFE
+MAIN_ITEMS = {"input": INPUT, "output": OUTPUT, "feature": FEATURE}
+# main item data bits
+CONSTANT, VARIABLE = 0x01, 0x02
+
+# SI linear unit codes -> (unit, exponent that makes the CGS based value SI)
+UNITS = {
+    0x0000D121: ("W", -7),
+    0x00F0D121: ("V", -7),
+    0x00100001: ("A", 0),
+    0x00001001: ("s", 0),
+}
+
+
+def not_discharging(minutes: int) -> int:
+    # I geuss 0x3317 means the battery is not discharging
+    return -1 if minutes == 0x1733 else minutes
+
+
+# (usage page, usage) -> (name, unit or None for the descriptor's, convert)
+# Power Device (0x84) and Battery System (0x85) pages, as in the HID Usage
+# Tables for Power Devices
+USAGES: dict[tuple[int, int], tuple[str, str | None, Callable[[int], Any] | None]] = {
+    (0x84, 0x30): ("Voltage", None, None),
+    (0x84, 0x40): ("Config Voltage", None, None),
+    (0x84, 0x44): ("Config Active Power", None, None),
+    (0x84, 0x55): ("Delay Before Reboot", "s", None),
+    (0x84, 0x57): ("Delay Before Shutdown", "s", None),
+    (0x84, 0x5A): ("Audible Alarm Control", "", None),
+    (0x84, 0x68): ("Shutdown Requested", "", None),
+    (0x84, 0x69): ("Shutdown Imminent", "", None),
+    (0x85, 0x29): ("Remaining Capacity Limit", "?", None),
+    (0x85, 0x2A): ("Remaining Time Limit", None, None),
+    (0x85, 0x2C): ("Capacity Mode", "", None),
+    (0x85, 0x42): ("Below Remaining Capacity Limit", "", None),
+    (0x85, 0x43): ("Remaining Time Limit Expired", "", None),
+    (0x85, 0x44): ("Charging", "", None),
+    (0x85, 0x45): ("Discharging", "", None),
+    (0x85, 0x46): ("Fully Charged", "", None),
+    (0x85, 0x47): ("Fully Discharged", "", None),
+    (0x85, 0x4B): ("Need Replacement", "", None),
+    (0x85, 0x66): ("Charge Level", "%", None),
+    (0x85, 0x67): ("Full Charge Capacity", "?", None),
+    (0x85, 0x68): ("Battery Time Remaining", "min", not_discharging),
+    (0x85, 0x69): ("Average Time To Empty", None, None),
+    (0x85, 0x6A): ("Average Time To Full", None, None),
+    (0x85, 0x83): ("Design Capacity", "?", None),
+    (0x85, 0x85): ("Manufacturer Date", "", None),
+    (0x85, 0x89): ("Device Chemistry", "", None),
+    (0x85, 0x8B): ("Rechargeable", "", None),
+    (0x85, 0x8C): ("Warning Capacity Limit", "?", None),
+    (0x85, 0x8D): ("Capacity Granularity 1", "?", None),
+    (0x85, 0x8E): ("Capacity Granularity 2", "?", None),
+    (0x85, 0x8F): ("OEM Information", "", None),
+    (0x85, 0xD0): ("AC Present", "", None),
+    (0x85, 0xD1): ("Battery Present", "", None),
+    (0x85, 0xDB): ("Voltage Not Regulated", "", None),
+}
+
+
+class Field:
+    """
+    One value in a report, where and how the descriptor lays it out
+
+    offset and size are in bits from the start of the payload (after the
+    report ID byte). name, unit and convert come from USAGES; without a
+    unit there, a unit from UNITS scales the value by the unit exponent.
+    """
+
+    __slots__ = (
+        "page",
+        "usage",
+        "offset",
+        "size",
+        "logical_min",
+        "logical_max",
+        "unit_code",
+        "unit_exponent",
+        "name",
+        "unit",
+        "convert",
+        "scale",
+    )
+
+    page: int
+    usage: int | None
+    offset: int
+    size: int
+    logical_min: int
+    logical_max: int
+    unit_code: int
+    unit_exponent: int
+    name: str
+    unit: str
+    convert: Callable[[int], Any] | None
+    scale: float
+
+    def __init__(
+        self,
+        page: int,
+        usage: int | None,
+        offset: int,
+        size: int,
+        logical_min: int = 0,
+        logical_max: int = 0,
+        unit_code: int = 0,
+        unit_exponent: int = 0,
+    ) -> None:
+        self.page = page
+        self.usage = usage
+        self.offset = offset
+        self.size = size
+        self.logical_min = logical_min
+        self.logical_max = logical_max
+        self.unit_code = unit_code
+        self.unit_exponent = unit_exponent
+        self.name, self.unit, self.convert = USAGES.get(
+            (page, usage), ("unknown-h", None, None)
+        )
+        self.scale = 1
+        if self.unit is None:
+            self.unit, offset = UNITS.get(unit_code, ("?", None))
+            if offset is not None and unit_exponent + offset:
+                self.scale = 10.0 ** (unit_exponent + offset)
+        if self.convert is None and size == 1 and logical_max == 1:
+            self.convert = bool
+
+    @property
+    def signed(self) -> bool:
+        return self.logical_min < 0
+
+    def value(self, logical: int) -> Any:
+        if self.convert:
+            return self.convert(logical)
+        if self.scale != 1:
+            return logical * self.scale
+        return logical
+
+    def __repr__(self) -> str:
+        return (
+            f"Field({self.name!r}, offset={self.offset}, size={self.size}, "
+            f"logical=({self.logical_min}, {self.logical_max}), "
+            f"unit=0x{self.unit_code:x}e{self.unit_exponent})"
+        )
+
+
+class Report:
+    """
+    One report ID's fields, with their decoding worked out up front
+
+    length is what to ask the device for: the report ID byte plus the
+    payload. When every field is 8, 16 or 32 bits and byte aligned the
+    payload is unpacked by one precompiled struct.Struct, otherwise bit by
+    bit from one integer. Reports of single bits (report 7, the status
+    flags) also give the whole payload as "Flags".
+    """
+
+    __slots__ = ("id", "fields", "length", "fmt", "flags", "bits", "plan")
+
+    id: int
+    fields: list[Field]
+    length: int
+    fmt: struct.Struct | None
+    flags: bool
+    # (offset, mask, sign bit or 0) per field, for when fmt can't be used
+    bits: list[tuple[int, int, int]]
+    # (name, unit, where its bytes are or None, convert or None) per field
+    plan: list[tuple[str, str, slice | None, Callable[[int], Any] | None]]
+
+    def __init__(self, id: int, fields: list[Field], bits: int) -> None:
+        self.id = id
+        self.fields = fields
+        self.length = 1 + (bits + 7) // 8
+        self.fmt = self.compile(fields)
+        self.flags = bool(fields) and all(f.size == 1 for f in fields)
+        self.bits = [
+            (f.offset, (1 << f.size) - 1, 1 << (f.size - 1) if f.signed else 0)
+            for f in fields
+        ]
+        self.plan = []
+        for f in fields:
+            where = None
+            if not (f.size % 8 or f.offset % 8):
+                where = slice(f.offset // 8, (f.offset + f.size) // 8)
+            convert = f.convert or (f.value if f.scale != 1 else None)
+            self.plan.append((f.name, f.unit, where, convert))
+
+    @staticmethod
+    def compile(fields: list[Field]) -> struct.Struct | None:
+        fmt = "<"
+        at = 0
+        for f in fields:
+            code = {8: "b", 16: "h", 32: "i"}.get(f.size)
+            if code is None or f.offset % 8 or f.offset < at:
+                return None
+            fmt += "x" * ((f.offset - at) // 8)
+            fmt += code if f.signed else code.upper()
+            at = f.offset + f.size
+        return struct.Struct(fmt)
+
+    def unpack(self, payload: bytes) -> list[int] | tuple[int, ...]:
+        """
+        every field's logical value
+        """
+        if self.fmt and len(payload) >= self.fmt.size:
+            return self.fmt.unpack_from(payload)
+        n = int.from_bytes(payload, "little")
+        ret = []
+        for offset, mask, sign in self.bits:
+            value = (n >> offset) & mask
+            if value & sign:
+                value -= sign << 1
+            ret.append(value)
+        return ret
+
+    def decode(self, payload: bytes) -> list[tuple[str, Any, Any, str]]:
+        """
+        (name, raw, value, unit) for every field of a report's payload. raw
+        is the field's bytes, or its bits as an integer when not byte aligned
+        """
+        ret = []
+        if self.flags:
+            bits = "0b" + "".join([f"{x:08b}" for x in payload])
+            ret.append(("Flags", payload, bits, ""))
+        for (name, unit, where, convert), logical in zip(
+            self.plan, self.unpack(payload)
+        ):
+            raw = logical if where is None else payload[where]
+            value = logical if convert is None else convert(logical)
+            ret.append((name, raw, value, unit))
+        return ret
+
+    def __repr__(self) -> str:
+        return f"Report({self.id}, length={self.length}, fields={self.fields!r})"
+
+
+def signed(data: bytes) -> int:
+    return int.from_bytes(data, "little", signed=True)
+
+
+def parse_descriptor(descriptor: bytes, kind: str = "feature") -> dict[int, Report]:
+    """
+    the input, output or feature reports a HID report descriptor declares,
+    by report ID
+
+    Only what's needed to lay the reports out is tracked: global state
+    (with Push/Pop), usages and report sizes. Collections are skipped over
+    rather than matched, so missing End Collections and a trailing dangling
+    item (as in RIVER3PLUS_DESCRIPTOR) are fine. Constant items without
+    usages are padding.
+    """
+    main = MAIN_ITEMS[kind]
+    state = {
+        USAGE_PAGE: 0,
+        LOGICAL_MIN: 0,
+        LOGICAL_MAX: b"",  # as given, see below
+        UNIT_EXPONENT: 0,
+        UNIT: 0,
+        REPORT_SIZE: 0,
+        REPORT_ID: 0,
+        REPORT_COUNT: 0,
+    }
+    stack = []
+    usages = []
+    usage_min = None
+    fields = {}  # report ID -> [Field]
+    bits = {}  # report ID -> payload bits so far
+    i = 0
+    while i < len(descriptor):
+        prefix = descriptor[i]
+        if prefix == LONG_ITEM:
+            if i + 1 >= len(descriptor):
+                break
+            i += 3 + descriptor[i + 1]
+            continue
+        size = (0, 1, 2, 4)[prefix & 0x03]
+        data = descriptor[i + 1 : i + 1 + size]
+        if len(data) < size:
+            break  # cut off mid item
+        i += 1 + size
+        item = prefix & 0xFC
+        value = int.from_bytes(data, "little")
+
+        if item in (INPUT, OUTPUT, FEATURE):
+            rid = state[REPORT_ID]
+            at = bits.get(rid, 0)
+            count = state[REPORT_COUNT]
+            width = state[REPORT_SIZE]
+            if item == main and (usages or not value & CONSTANT):
+                if not value & VARIABLE:
+                    usages = []  # an array of usage indices, not values
+                logical_min = state[LOGICAL_MIN]
+                logical_max = signed(state[LOGICAL_MAX])
+                if logical_max < logical_min:
+                    # eg. 0x26 0xff 0xff meant as 65535 rather than -1
+                    logical_max = int.from_bytes(state[LOGICAL_MAX], "little")
+                for n in range(count):
+                    page, usage = (
+                        usages[min(n, len(usages) - 1)] if usages else (0, None)
+                    )
+                    field = Field(
+                        page,
+                        usage,
+                        at + n * width,
+                        width,
+                        logical_min,
+                        logical_max,
+                        state[UNIT],
+                        state[UNIT_EXPONENT],
+                    )
+                    fields.setdefault(rid, []).append(field)
+            if item == main:
+                bits[rid] = at + count * width
+            usages = []
+            usage_min = None
+        elif item in (COLLECTION, END_COLLECTION):
+            usages = []
+            usage_min = None
+        elif item == LOGICAL_MIN:
+            state[item] = signed(data)
+        elif item == LOGICAL_MAX:
+            state[item] = data
+        elif item == UNIT_EXPONENT:
+            # a signed nibble, though some descriptors use a signed byte
+            state[item] = value - 16 if 8 <= value <= 15 else signed(data)
+        elif item in state:
+            state[item] = value
+        elif item == PUSH:
+            stack.append(dict(state))
+        elif item == POP:
+            if stack:
+                state = stack.pop()
+        elif item in (USAGE, USAGE_MIN, USAGE_MAX):
+            if size == 4:
+                page, value = value >> 16, value & 0xFFFF
+            else:
+                page = state[USAGE_PAGE]
+            if item == USAGE:
+                usages.append((page, value))
+            elif item == USAGE_MIN:
+                usage_min = value
+            elif usage_min is not None:
+                usages.extend((page, u) for u in range(usage_min, value + 1))
+                usage_min = None
+
+    return {
+        rid: Report(rid, fields.get(rid, []), n)
+        for (rid, n) in bits.items()
+        if n or rid in fields
+    }
+
+
+@functools.lru_cache(maxsize=None)
+def report_map(descriptor: bytes) -> dict[int, Report]:
+    """
+    the feature reports of a descriptor, parsed once per distinct descriptor
+    (so reconnecting costs nothing). shared, so not to be modified
+    """
+    return parse_descriptor(descriptor)
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+
+from typing import Any
+
+
+class Sample:
+    """
+    One decoded field
+
+    raw holds what came off the wire. The "data" string seen in the json
+    output is only built from it when something asks for it. t is the
+    time.monotonic() the field was acquired at, when that was recorded, and
+    age how many seconds old it was when handed out (for cached fields).
+    """
+
+    __slots__ = ("type", "raw", "value", "unit", "t", "age")
+
+    type: str
+    raw: Any
+    value: Any
+    unit: str
+    t: float | None
+    age: float | None
+
+    def __init__(
+        self, type: str, raw: Any, value: Any, unit: str = "", t: float | None = None
+    ) -> None:
+        self.type = type
+        self.raw = raw
+        self.value = value
+        self.unit = unit
+        self.t = t
+        self.age = None
+
+    @property
+    def data(self) -> Any:
+        raw = self.raw
+        if isinstance(raw, (bytes, bytearray, memoryview)):
+            ret = "0x" + raw.hex()
+        elif isinstance(raw, float):
+            ret = raw.hex()
+        else:
+            ret = raw
+        return ret
+
+    def __getitem__(self, key: str) -> Any:
+        # lets old code keep doing result[name]["value"]
+        if key in ("type", "data", "value", "unit"):
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def __repr__(self) -> str:
+        return f"Sample({self.type!r}, {self.raw!r}, {self.value!r}, {self.unit!r})"
+
+    def as_dict(self) -> dict:
+        ret = {
+            "type": self.type,
+            "data": self.data,
+            "value": self.value,
+            "unit": self.unit,
+        }
+        if self.t is not None:
+            ret["time"] = self.t
+        if self.age is not None:
+            ret["age"] = self.age
+        return ret
+
+
+def as_dicts(result: dict[str, Sample]) -> dict[str, dict]:
+    """
+    a get() style result in the original dict-of-dicts shape
+    """
+    return {name: sample.as_dict() for (name, sample) in result.items()}
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+
+import time
+from collections.abc import Callable
+
+from ._timing import Timings
+
+POLICIES = ("skip", "catchup")
+
+
+class Scheduler:
+    """
+    Paces a loop on absolute deadlines of a monotonic clock
+
+    Tick n is due at start + n * period however long the work between
+    ticks took, so the achieved period doesn't drift. When the work
+    overruns by a whole period or more, policy "skip" drops the ticks that
+    were missed and runs the latest one due right away, "catchup" runs
+    every missed tick back to back. clock and sleep default to
+    time.monotonic and time.sleep; hand in fakes to test without waiting.
+    period may be changed between ticks, it applies from the next one on.
+    Tick statistics go to timings when given, none are kept without.
+    """
+
+    period: float
+    policy: str
+    clock: Callable[[], float]
+    sleep: Callable[[float], None]
+    deadline: float | None
+    started: float | None
+    n: int
+    timings: Timings | None
+
+    def __init__(
+        self,
+        period: float,
+        policy: str = "skip",
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+        timings: Timings | None = None,
+    ) -> None:
+        if policy not in POLICIES:
+            raise ValueError(f"policy must be one of {POLICIES}, not {policy!r}")
+        self.period = period
+        self.policy = policy
+        self.clock = clock
+        self.sleep = sleep
+        self.deadline = None
+        self.started = None
+        self.n = 0
+        self.timings = timings
+
+    def wait(self) -> int:
+        """
+        sleep until the next tick is due and return its number, the first
+        one being 0 and due immediately
+        """
+        if (delay := self.advance()) > 0:
+            self.sleep(delay)
+        return self.begin()
+
+    def advance(self) -> float:
+        """
+        move on to the next tick, applying the policy, and return the
+        seconds until it's due. for sleeping some other way than sleep, eg.
+        await asyncio.sleep(sched.advance()), then begin()
+        """
+        now = self.clock()
+        if self.deadline is None:
+            self.deadline = now
+        else:
+            self.deadline += self.period
+            self.n += 1
+            behind = now - self.deadline
+            if self.policy == "skip" and self.period > 0 and behind >= self.period:
+                missed = int(behind // self.period)
+                self.deadline += missed * self.period
+                self.n += missed
+                if self.timings:
+                    self.timings.count("skipped_ticks", missed)
+        return max(self.deadline - now, 0.0)
+
+    def begin(self) -> int:
+        """
+        record the tick advance() moved on to as starting now, return its number
+        """
+        now = self.clock()
+        timings = self.timings
+        if timings:
+            if self.started is not None:
+                timings.add("period", max(0, round((now - self.started) * 1e9)))
+            timings.add("lateness", max(0, round((now - self.deadline) * 1e9)))
+            timings.count("ticks")
+        self.started = now
+        return self.n
+
+    def stats(self) -> dict:
+        """
+        achieved periods between tick starts and how late each tick started,
+        in the Timings.stats() shape, empty without timings
+        """
+        ret = {"phases": {}, "counters": {}}
+        if self.timings:
+            ret = self.timings.stats()
+        return ret
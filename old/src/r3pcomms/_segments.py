@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+
+import struct
+from collections.abc import Callable
+from typing import Any
+
+# every segment starts with its type and data length
+SEGMENT_HEADER = struct.Struct("<HB")
+
+
+class SegmentDecoder:
+    """
+    How to turn one serial reply segment's data into a value
+
+    fmt is compiled once into a struct.Struct. convert gets the unpacked
+    tuple (or the raw segment bytes when there's no fmt) and returns the
+    value to report. With no convert, the unpacked tuple is the value.
+    """
+
+    __slots__ = ("name", "unit", "fmt", "convert")
+
+    name: str
+    unit: str
+    fmt: struct.Struct | None
+    convert: Callable[[Any], Any] | None
+
+    def __init__(
+        self,
+        name: str,
+        unit: str = "?",
+        fmt: str | None = None,
+        convert: Callable[[Any], Any] | None = None,
+    ) -> None:
+        self.name = name
+        self.unit = unit
+        self.fmt = struct.Struct(fmt) if fmt else None
+        self.convert = convert
+
+    def decode(self, data: bytes) -> Any:
+        if self.fmt:
+            value = self.fmt.unpack(data)
+        else:
+            value = data
+        if self.convert:
+            value = self.convert(value)
+        return value
+
+
+def first(unpacked: tuple) -> Any:
+    return unpacked[0]
+
+
+def negated(unpacked: tuple) -> Any:
+    return unpacked[0] * -1
+
+
+def tenths(unpacked: tuple) -> float:
+    return unpacked[0] / 10
+
+
+def charge_time(data: bytes) -> int | tuple[int, int]:
+    if data[:2] == b"\x33\x17":
+        # 0x3317 means the battery is not charging?
+        ret = -1
+    else:
+        ret = struct.unpack("<HH", data)
+    return ret
+
+
+def hexed(data: bytes) -> str:
+    return data.hex()
+
+
+def unknown(data: bytes) -> tuple[int, int] | str:
+    if len(data) == 4:
+        ret = struct.unpack("<HH", data)
+    else:
+        ret = data.hex()
+    return ret
+
+
+SEGMENT_DECODERS: dict[int, SegmentDecoder] = {
+    3: SegmentDecoder("Design Charge Capacity", "mAh", "<I", first),
+    # the second one is for the battery
+    4: SegmentDecoder("Temperatures", "degC", "<BBBB"),
+    7: SegmentDecoder("Total Load", "W", "<f", first),
+    8: SegmentDecoder("Total Draw", "W", "<f", first),
+    9: SegmentDecoder("AC Draw", "W", "<f", first),
+    12: SegmentDecoder("Solar/DC Draw", "W", "<f", first),
+    13: SegmentDecoder("Line Frequency?", "Hz", "<L", tenths),
+    14: SegmentDecoder("AC Load", "W", "<f", negated),
+    15: SegmentDecoder("AC Load Frequency?", "Hz", "<HH"),
+    16: SegmentDecoder("DC Load", "W", "<f", negated),
+    17: SegmentDecoder("USB-A Load", "W", "<f", negated),
+    18: SegmentDecoder("USB-C Load", "W", "<f", negated),
+    # redaction and decoding happen in R3PComms.serial_segmenter
+    22: SegmentDecoder("Serial Num", ""),
+    23: SegmentDecoder("Remaining Charge Time", "min", None, charge_time),
+    25: SegmentDecoder("Model/Mfg. Batch/Date?", "?", None, hexed),
+}
+
+UNKNOWN_SEGMENT = SegmentDecoder("unknown-s", "?", None, unknown)
+
+
+def register_segment(seg_type: int, decoder: SegmentDecoder) -> None:
+    """
+    decode serial segments of seg_type with decoder from now on
+    """
+    SEGMENT_DECODERS[seg_type] = decoder
@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+
+import contextlib
+import mmap
+import os
+import struct
+import time
+from collections.abc import Iterable, Sequence
+
+from ._util import slug
+
+MAGIC = b"R3PRING1"
+# magic, columns, capacity, rows ever appended, then the rollup bucket being
+# filled: start, min, max, sum, count
+HEADER = struct.Struct("<8sIIQ5d")
+RAW_COLUMNS = ("time", "value")
+ROLLUP_COLUMNS = ("time", "min", "max", "mean")
+ROLLUPS = (60, 3600)
+
+
+class Ring:
+    """
+    A fixed size, memory-mapped ring of float64 rows, stored column by column
+
+    Rows are appended in time order and the oldest are overwritten once
+    capacity is reached. Range queries bisect the time column and slice
+    only the columns asked for.
+    """
+
+    path: str
+    columns: tuple[str, ...]
+    capacity: int
+    count: int
+    m: mmap.mmap
+    view: memoryview
+    cols: list[memoryview]
+
+    def __init__(
+        self,
+        path: str,
+        columns: Sequence[str],
+        capacity: int,
+        writable: bool = True,
+    ) -> None:
+        self.path = path
+        self.columns = tuple(columns)
+        if writable and not os.path.exists(path):
+            with open(path, "wb") as f:
+                f.truncate(HEADER.size + 8 * len(columns) * capacity)
+                f.write(HEADER.pack(MAGIC, len(columns), capacity, 0, *[0.0] * 5))
+        with open(path, "r+b" if writable else "rb") as f:
+            access = mmap.ACCESS_WRITE if writable else mmap.ACCESS_READ
+            self.m = mmap.mmap(f.fileno(), 0, access=access)
+        magic, ncols, self.capacity, self.count, *_ = HEADER.unpack_from(self.m)
+        if magic != MAGIC or ncols != len(columns):
+            self.m.close()
+            raise ValueError(f"{path} is not a {len(columns)} column ring")
+        size = 8 * self.capacity
+        self.view = memoryview(self.m)
+        self.cols = [
+            self.view[HEADER.size + i * size : HEADER.size + (i + 1) * size].cast("d")
+            for i in range(ncols)
+        ]
+
+    def close(self) -> None:
+        for col in self.cols:
+            col.release()
+        self.cols = []
+        self.view.release()
+        self.m.close()
+
+    def refresh(self) -> None:
+        """
+        pick up rows appended by a writer in another process
+        """
+        (self.count,) = struct.unpack_from("<Q", self.m, 16)
+
+    def __len__(self) -> int:
+        return min(self.count, self.capacity)
+
+    def append(self, row: Sequence[float]) -> None:
+        i = self.count % self.capacity
+        for col, value in zip(self.cols, row):
+            col[i] = value
+        self.count += 1
+        struct.pack_into("<Q", self.m, 16, self.count)
+
+    @property
+    def pending(self) -> tuple[float, float, float, float, float]:
+        return HEADER.unpack_from(self.m)[4:]
+
+    @pending.setter
+    def pending(self, value: Sequence[float]) -> None:
+        struct.pack_into("<5d", self.m, 24, *value)
+
+    def physical(self, i: int) -> int:
+        # the i-th oldest row's slot
+        return (self.count - len(self) + i) % self.capacity
+
+    def bisect(self, t: float) -> int:
+        """
+        how many rows are older than t
+        """
+        times = self.cols[0]
+        lo, hi = 0, len(self)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if times[self.physical(mid)] < t:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def range(
+        self, t0: float, t1: float, columns: Iterable[str] | None = None
+    ) -> dict[str, list[float]]:
+        """
+        the given columns of every row with t0 <= time < t1
+        """
+        names = self.columns if columns is None else tuple(columns)
+        lo = self.bisect(t0)
+        hi = self.bisect(t1)
+        start = self.physical(lo) if hi > lo else 0
+        end = start + (hi - lo)
+        ret = {}
+        for name in names:
+            col = self.cols[self.columns.index(name)]
+            if end <= self.capacity:
+                ret[name] = col[start:end].tolist()
+            else:
+                ret[name] = col[start:].tolist() + col[: end - self.capacity].tolist()
+        return ret
+
+
+class Store:
+    """
+    Long term local logging of every numeric field, one directory per unit
+
+    Each field gets a raw (time, value) ring plus min/max/mean rollup rings
+    at every ROLLUPS resolution (1 min and 1 h), all fixed size and
+    memory-mapped. Times are Unix times. Lists (like Temperatures) are
+    stored per element as "Name[i]".
+    """
+
+    path: str
+    capacity: int
+    rollup_capacity: dict[int, int]
+    writable: bool
+    rings: dict[tuple[str, int], Ring]
+
+    def __init__(
+        self,
+        path: str,
+        capacity: int = 14 * 86400,
+        rollup_capacity: dict[int, int] | None = None,
+        writable: bool = True,
+    ) -> None:
+        self.path = path
+        self.capacity = capacity
+        self.rollup_capacity = {60: 366 * 1440, 3600: 10 * 366 * 24} | (
+            rollup_capacity or {}
+        )
+        self.writable = writable
+        self.rings = {}
+        if writable:
+            os.makedirs(path, exist_ok=True)
+
+    @classmethod
+    def maybe(cls, path: str | None) -> "Store | contextlib.nullcontext":
+        """
+        a Store at path, or a context manager giving None without one
+        """
+        return cls(path) if path else contextlib.nullcontext()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
+
+    def close(self) -> None:
+        for ring in self.rings.values():
+            ring.close()
+        self.rings = {}
+
+    def fields(self) -> list[str]:
+        """
+        names of every stored field
+        """
+        try:
+            with open(os.path.join(self.path, "fields")) as f:
+                ret = [line.rstrip("\n") for line in f]
+        except FileNotFoundError:
+            ret = []
+        return ret
+
+    def ring(self, field: str, resolution: int = 0) -> Ring:
+        ring = self.rings.get((field, resolution))
+        if ring is None:
+            name = slug(field.replace("[", "_"))
+            if resolution:
+                columns = ROLLUP_COLUMNS
+                capacity = self.rollup_capacity[resolution]
+                path = os.path.join(self.path, f"{name}.{resolution}s")
+            else:
+                columns = RAW_COLUMNS
+                capacity = self.capacity
+                path = os.path.join(self.path, f"{name}.raw")
+                if self.writable and not os.path.exists(path):
+                    with open(os.path.join(self.path, "fields"), "a") as f:
+                        f.write(f"{field}\n")
+            if not self.writable and not os.path.exists(path):
+                raise KeyError(field)
+            ring = Ring(path, columns, capacity, self.writable)
+            self.rings[(field, resolution)] = ring
+        return ring
+
+    def add(self, field: str, t: float, value: float) -> None:
+        self.ring(field).append((t, value))
+        for res in ROLLUPS:
+            ring = self.ring(field, res)
+            bucket, lo, hi, total, n = ring.pending
+            start = t - t % res
+            if n and start != bucket:
+                ring.append((bucket, lo, hi, total / n))
+                n = 0
+            if n:
+                ring.pending = (
+                    bucket,
+                    min(lo, value),
+                    max(hi, value),
+                    total + value,
+                    n + 1,
+                )
+            else:
+                ring.pending = (start, value, value, value, 1)
+
+    def append(self, result: dict, t: float | None = None) -> None:
+        """
+        store every numeric field of a get() style result, at its "Unix Time"
+        (from annotate()) unless t is given
+        """
+        if t is None:
+            t = result["Unix Time"].value if "Unix Time" in result else time.time()
+        for name, sample in result.items():
+            if sample.type.startswith("i"):
+                continue  # run/timing info, not measurements
+            value = sample.value
+            if isinstance(value, (list, tuple)):
+                for i, x in enumerate(value):
+                    if isinstance(x, (int, float)):
+                        self.add(f"{name}[{i}]", t, x)
+            elif isinstance(value, (int, float)):
+                self.add(name, t, value)
+
+    def query(
+        self,
+        field: str,
+        t0: float = 0.0,
+        t1: float = float("inf"),
+        resolution: int = 0,
+        columns: Iterable[str] | None = None,
+    ) -> dict[str, list[float]]:
+        """
+        field's rows with t0 <= time < t1, raw or at a ROLLUPS resolution
+        (including the bucket still being filled)
+        """
+        ring = self.ring(field, resolution)
+        ring.refresh()
+        ret = ring.range(t0, t1, columns)
+        if resolution:
+            bucket, lo, hi, total, n = ring.pending
+            if n and t0 <= bucket < t1:
+                row = dict(zip(ROLLUP_COLUMNS, (bucket, lo, hi, total / n)))
+                for name in ret:
+                    ret[name].append(row[name])
+        return ret
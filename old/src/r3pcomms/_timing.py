@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+
+import math
+
+
+class Histogram:
+    """
+    Durations in nanoseconds, bucketed by powers of two
+
+    Cheap enough to add to on every call; percentiles come out as the upper
+    edge of the bucket they fall in, so within a factor of two.
+    """
+
+    __slots__ = ("buckets", "count", "total", "min", "max")
+
+    buckets: list[int]
+    count: int
+    total: int
+    min: int
+    max: int
+
+    def __init__(self) -> None:
+        self.buckets = [0] * 64
+        self.count = 0
+        self.total = 0
+        self.min = 0
+        self.max = 0
+
+    def add(self, ns: int) -> None:
+        self.buckets[ns.bit_length()] += 1
+        if not self.count or ns < self.min:
+            self.min = ns
+        if ns > self.max:
+            self.max = ns
+        self.count += 1
+        self.total += ns
+
+    def percentile(self, q: float) -> int:
+        """
+        upper bound of the q-th (0-100) percentile
+        """
+        want = math.ceil(self.count * q / 100)
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if n and seen >= want:
+                return min((1 << i) - 1, self.max)
+        return self.max
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "mean_us": self.total / self.count / 1e3 if self.count else 0.0,
+            "min_us": self.min / 1e3,
+            "p50_us": self.percentile(50) / 1e3,
+            "p90_us": self.percentile(90) / 1e3,
+            "p99_us": self.percentile(99) / 1e3,
+            "max_us": self.max / 1e3,
+        }
+
+
+class Timings:
+    """
+    Per phase latency histograms and event counters for one connection
+
+    Code on the hot path only touches this when instrumentation is on, see
+    R3PComms.instrument().
+    """
+
+    __slots__ = ("phases", "counters")
+
+    phases: dict[str, Histogram]
+    counters: dict[str, int]
+
+    def __init__(self) -> None:
+        self.phases = {}
+        self.counters = {}
+
+    def add(self, phase: str, ns: int) -> None:
+        hist = self.phases.get(phase)
+        if hist is None:
+            hist = self.phases[phase] = Histogram()
+        hist.add(ns)
+
+    def count(self, counter: str, n: int = 1) -> None:
+        self.counters[counter] = self.counters.get(counter, 0) + n
+
+    def stats(self) -> dict:
+        return {
+            "phases": {k: v.summary() for (k, v) in self.phases.items()},
+            "counters": dict(self.counters),
+        }
+
+
+def format_stats(stats: dict) -> str:
+    """
+    a stats() dict as a table for humans
+    """
+    lines = [
+        f"{'phase':<14}{'count':>8}{'mean':>10}{'p50':>10}{'p90':>10}"
+        f"{'p99':>10}{'max':>10}  (us)"
+    ]
+    for name, s in stats["phases"].items():
+        lines.append(
+            f"{name:<14}{s['count']:>8}{s['mean_us']:>10.1f}{s['p50_us']:>10.1f}"
+            f"{s['p90_us']:>10.1f}{s['p99_us']:>10.1f}{s['max_us']:>10.1f}"
+        )
+    for name, n in stats["counters"].items():
+        lines.append(f"{name:<14}{n:>8}")
+    return "\n".join(lines)
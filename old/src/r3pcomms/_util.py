@@ -0,0 +1,10 @@
+#!/usr/bin/env python3
+
+import re
+
+
+def slug(name: str) -> str:
+    """
+    a field or device name as an MQTT topic level, HA object id or file name
+    """
+    return re.sub(r"[^a-z0-9]+", "_", name.lower()).strip("_")
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+
+import sys
+from collections.abc import Callable
+from typing import TYPE_CHECKING
+
+from ._schedule import Scheduler
+
+if TYPE_CHECKING:
+    from ._r3pcomms import R3PComms
+
+AC_IN_BIT = 10  # in the Flags report (ID 7)
+
+
+def ac_live(flags: bytes) -> bool:
+    """
+    whether AC input is present, from the Flags report's payload
+    """
+    return bool(int.from_bytes(flags) & (1 << AC_IN_BIT))
+
+
+class Watchdog:
+    """
+    Low battery watchdog on one already open HID connection
+
+    Each check reads only report 12 (Charge Level) and report 7 (Flags). When
+    the charge level drops to low or below, action(level, ac) is called once;
+    it's only called again after the level has come back up to high
+    (hysteresis). Without AC input, checks happen every fast_every seconds
+    instead of every every seconds.
+    """
+
+    reports = (12, 7)
+
+    comms: "R3PComms"
+    low: int
+    high: int
+    every: float
+    fast_every: float
+    action: Callable[[int, bool], object] | None
+    tripped: bool
+    level: int | None
+    ac: bool | None
+
+    def __init__(
+        self,
+        comms: "R3PComms",
+        low: int = 10,
+        high: int | None = None,
+        every: float = 60.0,
+        fast_every: float = 5.0,
+        action: Callable[[int, bool], object] | None = None,
+    ) -> None:
+        self.comms = comms
+        self.low = low
+        self.high = low + 5 if high is None else max(high, low + 1)
+        self.every = every
+        self.fast_every = min(fast_every, every)
+        self.action = action
+        self.tripped = False
+        self.level = None
+        self.ac = None
+
+    def read(self) -> tuple[int, bool]:
+        """
+        (charge level %, AC in live) straight from the unit
+        """
+        level = self.comms.read_raw_report(12)
+        flags = self.comms.read_raw_report(7)
+        if not level or not flags:
+            raise ValueError("No HID device to watch")
+        return level[1], ac_live(flags[1:])
+
+    def update(self, level: int, ac: bool) -> bool:
+        """
+        feed one reading through the thresholds, True when action was called
+        """
+        self.level = level
+        self.ac = ac
+        fire = False
+        if self.tripped:
+            if level >= self.high:
+                self.tripped = False
+        elif level <= self.low:
+            self.tripped = fire = True
+        if fire and self.action:
+            self.action(level, ac)
+        return fire
+
+    def check(self) -> bool:
+        return self.update(*self.read())
+
+    def period(self) -> float:
+        """
+        seconds until the next check, shorter while running on battery
+        """
+        return self.every if self.ac else self.fast_every
+
+    def run(self, count: int = 0, policy: str = "skip") -> None:
+        """
+        check count times (forever when 0) on a Scheduler's deadlines, with
+        missed checks handled per policy. read errors are reported and
+        retried at the fast rate rather than ending the watch
+        """
+        sched = Scheduler(self.every, policy)
+        n = 0
+        while not count or n < count:
+            sched.wait()
+            n += 1
+            try:
+                self.check()
+                sched.period = self.period()
+            except ValueError as e:
+                print(e, file=sys.stderr, flush=True)
+                sched.period = self.fast_every
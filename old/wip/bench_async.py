@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+# AsyncR3PComms against the pty Emulator: a reply that turns up after its
+# query timed out must not be taken for the next query's reply, and what a
+# query() costs next to the blocking R3PComms one
+# run like: PYTHONPATH=src python wip/bench_async.py
+import asyncio
+import time
+
+from r3pcomms import AsyncR3PComms, Emulator, R3PComms
+
+QUERIES = 2000
+
+
+async def check() -> None:
+    with Emulator(latency=0.4) as e:
+        async with AsyncR3PComms(e.port, timeout=0.3) as a:
+            a.instrument()
+            try:
+                await a.query(a.proto.serial_msg)
+                raise AssertionError("the serial number query should have timed out")
+            except ValueError:
+                pass
+            e.latency = 0.0
+            # the serial number reply to sequence number 0 lands during this
+            # query and is dropped, the metrics reply is decoded as metrics
+            result = await a.ser_get()
+            assert "Total Load" in result and "Temperatures" in result, result
+            assert not a.proto.pending and not a.proto.replies
+            assert a.stats()["counters"]["stale_replies"] == 1
+
+            a.proto.depth = 2
+            seqs = [await a.send(msg) for msg in (a.proto.serial_msg,) * 2]
+            replies = [await a.receive(seq) for seq in reversed(seqs)]
+            assert [R3PComms.get_sequencenum(r) for r in replies] == [3, 2]
+    print("late replies are dropped and replies reach their own requests")
+
+
+async def async_rate(port: str) -> float:
+    async with AsyncR3PComms(port) as a:
+        t = time.perf_counter()
+        for _ in range(QUERIES):
+            await a.query(a.proto.metrics_msg)
+        return (time.perf_counter() - t) / QUERIES
+
+
+def sync_rate(port: str) -> float:
+    with R3PComms(port) as d:
+        t = time.perf_counter()
+        for _ in range(QUERIES):
+            d.query(d.metrics_msg)
+        return (time.perf_counter() - t) / QUERIES
+
+
+def main() -> None:
+    asyncio.run(check())
+    with Emulator() as e:
+        blocking = sync_rate(e.port)
+        nonblocking = asyncio.run(async_rate(e.port))
+    print(
+        f"query(): R3PComms {blocking * 1e6:.0f} us, "
+        f"AsyncR3PComms {nonblocking * 1e6:.0f} us"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# decode_batch() (NumPy) against one decode_metrics() per frame, over
+# synthetic captures: mostly metrics replies with changing values, plus
+# requests, serial number replies, bad CRCs and a few with another layout
+# run like: PYTHONPATH=src python wip/bench_batch.py
+import random
+import struct
+import time
+
+from r3pcomms import Emulator, R3PComms
+from r3pcomms._batch import decode_batch
+from r3pcomms._segments import SEGMENT_DECODERS, UNKNOWN_SEGMENT
+
+FRAMES = 20000
+
+
+def capture(n: int) -> list[bytes]:
+    rnd = random.Random(1)
+    d = R3PComms()
+    unit = Emulator()
+    other = Emulator()
+    other.set(26, bytes(4))  # one more segment than usual
+    ret = []
+    for i in range(n):
+        unit.set(7, rnd.uniform(0, 500))
+        unit.set(14, -rnd.uniform(0, 500))
+        unit.set(4, tuple(rnd.randrange(20, 40) for _ in range(4)))
+        unit.set(13, rnd.choice((500, 600)))
+        r = rnd.random()
+        if r < 0.01:
+            ret.append(d.frame(d.metrics_msg))  # a request
+            continue
+        msg = d.serial_msg if r < 0.02 else d.metrics_msg
+        reply = (other if r > 0.99 else unit).reply(d.frame(msg))
+        if 0.98 < r < 0.985:
+            reply = reply[:-1] + bytes([reply[-1] ^ 0xFF])
+        ret.append(reply)
+    return ret
+
+
+def scalar(frames: list[bytes]) -> list[tuple[int, dict]]:
+    d = R3PComms()
+    ret = []
+    for i, frame in enumerate(frames):
+        if len(frame) > 24 and frame[17] == 2 and not R3PComms.crc16(frame):
+            ret.append((i, d.decode_metrics(frame[:-2])))
+    return ret
+
+
+def same(value, sample) -> bool:
+    expected = sample.value
+    if value.dtype.kind == "V":
+        # raw bytes in the array, for that segment's decoder to finish
+        if sample.type == "s22":
+            return value.tobytes() == sample.raw
+        decoder = SEGMENT_DECODERS.get(int(sample.type[1:]), UNKNOWN_SEGMENT)
+        return decoder.decode(value.tobytes()) == expected
+    if isinstance(expected, (tuple, list)):
+        return tuple(value.tolist()) == tuple(expected)
+    return value == expected
+
+
+def main() -> None:
+    try:
+        import numpy  # noqa: F401
+    except ImportError:
+        raise SystemExit("this needs numpy")
+    frames = capture(FRAMES)
+
+    t = time.perf_counter()
+    expected = scalar(frames)
+    t_scalar = time.perf_counter() - t
+
+    t = time.perf_counter()
+    batch = decode_batch(frames)
+    t_batch = time.perf_counter() - t
+
+    t = time.perf_counter()
+    from_buffer = decode_batch(b"".join(frames))
+    t_buffer = time.perf_counter() - t
+
+    # every scalar result is either a row or a fallback, with equal values
+    assert len(batch) == len(expected), (len(batch), len(expected))
+    assert len(from_buffer) == len(expected)
+    assert (from_buffer.array == batch.array).all()
+    got = {int(row["index"]): row for row in batch.array}
+    got_fallback = dict(batch.fallback)
+    names = batch.array.dtype.names[2:]
+    for i, result in expected:
+        if i in got_fallback:
+            assert {k: v.value for (k, v) in got_fallback[i].items()} == {
+                k: v.value for (k, v) in result.items()
+            }
+            continue
+        row = got[i]
+        assert row["seq"] == struct.unpack_from("<I", frames[i], 6)[0]
+        for name in names:
+            assert same(row[name], result[name]), (i, name)
+    print(
+        f"{len(batch.array)} rows + {len(batch.fallback)} fallbacks match the "
+        f"scalar decode, {batch.crc_errors} CRC errors, {batch.skipped} skipped"
+    )
+    print(
+        f"scalar:          {t_scalar * 1e3:7.1f} ms ({t_scalar / FRAMES * 1e6:.1f} us/frame)"
+    )
+    print(f"decode_batch():  {t_batch * 1e3:7.1f} ms ({t_scalar / t_batch:.1f}x)")
+    print(f"from one buffer: {t_buffer * 1e3:7.1f} ms ({t_scalar / t_buffer:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# DeltaEncoder records back through rebuild(), straight and via json, over a
+# stream with changing values and a field that comes and goes, then the
+# encode cost and how much smaller the output gets
+# run like: PYTHONPATH=src python wip/bench_delta.py
+import json
+import random
+import time
+
+from r3pcomms import DeltaEncoder, Emulator, R3PComms, Sample, rebuild
+from r3pcomms._delta import DEFAULT_DEADBANDS
+
+SAMPLES = 5000
+
+
+def stream(n: int, seed: int = 1) -> list[dict]:
+    """
+    n metrics results, the loads wandering and "Serial Num" missing from
+    every 7th one for a few samples, as when a unit drops a segment
+    """
+    d = R3PComms()
+    base = d.decode_metrics(Emulator().reply(d.frame(d.metrics_msg))[:-2])
+    rng = random.Random(seed)
+    ret = []
+    load = 250.0
+    for i in range(n):
+        load += rng.choice((0.0, 0.0, 0.2, -0.2, 5.0, -5.0))
+        result = dict(base)
+        result["AC Load"] = Sample("s14", b"", -load, "W")
+        result["Total Load"] = Sample("s7", b"", load, "W")
+        if i % 7 in (3, 4):
+            del result["Serial Num"]
+        ret.append(result)
+    return ret
+
+
+def values(result: dict) -> dict:
+    # as they'd read back from json, tuples being lists
+    return json.loads(json.dumps({k: v["value"] for (k, v) in result.items()}))
+
+
+def check() -> None:
+    results = stream(500)
+    exact = dict.fromkeys(DEFAULT_DEADBANDS, 0.0)
+    for deadbands in (exact, {}):
+        enc = DeltaEncoder(10, deadbands)
+        records = [enc.encode(r) for r in results]
+        as_json = [json.loads(json.dumps(r, default=Sample.as_dict)) for r in records]
+        for rebuilt in (list(rebuild(records)), list(rebuild(as_json))):
+            assert len(rebuilt) == len(results)
+            for want, got in zip(results, rebuilt):
+                got = values(got)
+                assert got.keys() == want.keys(), got.keys() ^ want.keys()
+                for name, value in values(want).items():
+                    band = enc.deadbands.get(name, 0.0)
+                    if band:
+                        assert abs(got[name] - value) < band, (name, got[name])
+                    else:
+                        assert got[name] == value, (name, got[name], value)
+    # the field going missing forces a keyframe, it coming back doesn't
+    keyframes = [i for (i, r) in enumerate(records) if r["Keyframe"].value]
+    assert keyframes[:4] == [0, 3, 10, 17], keyframes
+    assert "Serial Num" in records[5] and "Serial Num" not in records[6]
+
+    for keyframe in (0, -1):
+        try:
+            DeltaEncoder(keyframe)
+            raise AssertionError(f"keyframe {keyframe} should be refused")
+        except ValueError:
+            pass
+    print("rebuild() gives back every result, vanished fields included")
+
+
+def main() -> None:
+    check()
+    results = stream(SAMPLES)
+    enc = DeltaEncoder()
+    t = time.perf_counter()
+    records = [enc.encode(r) for r in results]
+    dt = (time.perf_counter() - t) / SAMPLES
+    full = sum(len(json.dumps(r, default=Sample.as_dict)) for r in results)
+    delta = sum(len(json.dumps(r, default=Sample.as_dict)) for r in records)
+    print(
+        f"encode(): {dt * 1e6:.1f} us per result, json output "
+        f"{delta / full:.0%} of the full samples' size"
+    )
+
+
+if __name__ == "__main__":
+    main()
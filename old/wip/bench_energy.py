@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# EnergyMeter against the exact energy of known power curves, its handling
+# of gaps and restarts, and what update() adds to each get()
+# run like: PYTHONPATH=src python wip/bench_energy.py
+import os
+import tempfile
+import time
+
+from r3pcomms import EnergyMeter, Emulator, R3PComms, Sample
+
+SAMPLES = 20000
+
+
+def reading(watts: float, t: float | None = None) -> dict:
+    # loads come negative, draws positive
+    return {
+        "Total Load": Sample("s7", -watts, -watts, "W", t),
+        "Total Draw": Sample("s14", watts, watts, "W", t),
+    }
+
+
+def check() -> None:
+    # a constant 360 W for an hour, read once a second: 360 Wh
+    meter = EnergyMeter()
+    for i in range(3601):
+        result = meter.update(reading(360.0), t=float(i))
+    assert abs(result["Total Load Energy"].value - 360.0) < 1e-9
+    assert abs(meter.wh["Total Draw"] - 360.0) < 1e-9
+
+    # a ramp from 0 to 1000 W over an hour, read every 7 s: exactly 500 Wh
+    # with the trapezoid rule, whatever the interval
+    meter = EnergyMeter()
+    for t in [*range(0, 3600, 7), 3600]:
+        meter.update(reading(1000 * t / 3600), t=float(t))
+    assert abs(meter.wh["Total Load"] - 500.0) < 1e-9
+
+    # the same reading again (a cached value) and a 2 minute outage add nothing
+    meter = EnergyMeter(max_gap=60.0)
+    meter.update(reading(100.0), t=0.0)
+    meter.update(reading(100.0), t=0.0)
+    meter.update(reading(100.0), t=36.0)
+    meter.update(reading(100.0), t=156.0)
+    meter.update(reading(100.0), t=192.0)
+    assert abs(meter.wh["Total Load"] - 2.0) < 1e-9, meter.wh
+    assert meter.gaps == 2  # one per field
+
+    # a field's own time stamp (overlap mode) beats the one given
+    meter = EnergyMeter()
+    meter.update(reading(3600.0, t=10.0), t=0.0)
+    meter.update(reading(3600.0, t=11.0), t=50.0)
+    assert abs(meter.wh["Total Load"] - 1.0) < 1e-9
+
+    # the counters survive a restart, the integration starts over
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "state", "energy.json")
+        with EnergyMeter(path) as meter:
+            meter.update(reading(3600.0), t=0.0)
+            meter.update(reading(3600.0), t=2.0)
+        with EnergyMeter(path) as meter:
+            assert abs(meter.wh["Total Load"] - 2.0) < 1e-9
+            meter.update(reading(3600.0), t=100.0)
+            meter.update(reading(3600.0), t=101.0)
+        assert abs(EnergyMeter(path).wh["Total Load"] - 3.0) < 1e-9
+        assert os.listdir(os.path.dirname(path)) == ["energy.json"]
+
+        with open(path, "w") as f:
+            f.write("{not json")
+        assert EnergyMeter(path).wh["Total Load"] == 0.0
+    print("constant, ramp, gaps, time stamps and restarts all check out")
+
+
+def main() -> None:
+    check()
+    d = R3PComms()
+    reply = Emulator().reply
+    results = [
+        d.decode_metrics(reply(d.frame(d.metrics_msg))[:-2]) for _ in range(SAMPLES)
+    ]
+
+    t = time.perf_counter()
+    for r in results:
+        d.decode_metrics(reply(d.frame(d.metrics_msg))[:-2])
+    decode = (time.perf_counter() - t) / SAMPLES
+
+    meter = EnergyMeter()
+    t = time.perf_counter()
+    for i, r in enumerate(results):
+        meter.update(r, t=float(i))
+    update = (time.perf_counter() - t) / SAMPLES
+    print(
+        f"update(): {update * 1e6:.1f} us per result, "
+        f"{update / decode:.0%} of a metrics decode ({decode * 1e6:.1f} us)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+# startup and per-report cost of the hidraw ioctl backend vs hidapi
+# discovery is timed on any Linux box, report reads need a unit plugged in
+# run like: PYTHONPATH=src python wip/bench_hidraw.py [VENDOR_ID:PRODUCT_ID]
+import sys
+import timeit
+
+from r3pcomms import R3PComms
+
+hiddev = sys.argv[1] if len(sys.argv) > 1 else "3746:ffff"
+vid, pid = (int(x, 16) for x in hiddev.split(":"))
+backends = [
+    b
+    for b in ("hidraw", "hidapi")
+    if b != "hidraw" or R3PComms.resolve_hid_backend() == "hidraw"
+]
+
+n = 50
+for backend in backends:
+    t = (
+        timeit.timeit(lambda: R3PComms.find_hid_devices(pid, vid, backend), number=n)
+        / n
+    )
+    print(f"{backend:6s} discovery: {t * 1e3:7.3f} ms")
+
+for backend in backends:
+    try:
+        d = R3PComms(hiddev=hiddev, hid_backend=backend)
+    except ValueError as e:
+        print(f"{backend:6s} reports: skipped, {e}")
+        continue
+    with d:
+        n = 200
+        t = timeit.timeit(lambda: d.read_raw_report(12), number=n) / n
+        print(f"{backend:6s} report 12: {t * 1e6:7.1f} us")
+        t = timeit.timeit(d.hid_get, number=n // 10) / (n // 10)
+        print(f"{backend:6s} hid_get(): {t * 1e3:7.3f} ms")
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+# the report descriptor parser against the River 3 Plus descriptor, and HID
+# polling through it on a fake device: exact report lengths, and one worker
+# thread trip per async hid_get() instead of one per report. no hardware
+# run like: PYTHONPATH=src python wip/bench_hidreport.py
+import asyncio
+import time
+
+from r3pcomms import AsyncR3PComms, R3PComms
+from r3pcomms._reportdesc import RIVER3PLUS_DESCRIPTOR, parse_descriptor, report_map
+from r3pcomms._watchdog import ac_live
+
+# report ID -> length (ID byte included), worked out by hand from
+# wip/parse_raw_rd_result.txt
+LENGTHS = {1: 3, 6: 2, 7: 3, 8: 3, 9: 3, 10: 3, 11: 3, 12: 2, 13: 3, 14: 2}
+LENGTHS |= {15: 2, 16: 2, 17: 2, 18: 3, 19: 3, 20: 2, 22: 2, 23: 2, 24: 2}
+LENGTHS |= {26: 3, 28: 3, 31: 2, 32: 2}
+
+REPORTS = {
+    1: bytes.fromhex("01b004"),  # 1200 W
+    7: bytes.fromhex("070e00"),  # discharging, AC and battery present
+    11: bytes.fromhex("0bb004"),  # 12.00 V
+    12: bytes.fromhex("0c4c"),  # 76 %
+    13: bytes.fromhex("0d3317"),  # not discharging
+    17: bytes.fromhex("110a"),
+    18: bytes.fromhex("12ffff"),  # -1
+    19: bytes.fromhex("13ffff"),
+}
+
+
+class OldFakeHid:
+    """
+    hid.device's feature report calls, answering from REPORTS after delay
+    seconds, like a USB control transfer would take. no report descriptor,
+    as with hidapi before 0.14
+    """
+
+    def __init__(self, delay: float = 0.0) -> None:
+        self.delay = delay
+        self.lengths = []
+
+    def open_path(self, path) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+    def get_feature_report(self, report_id: int, length: int) -> bytes:
+        self.lengths.append((report_id, length))
+        if self.delay:
+            time.sleep(self.delay)
+        return REPORTS[report_id][:length]
+
+
+class FakeHid(OldFakeHid):
+    def get_report_descriptor(self) -> bytes:
+        return RIVER3PLUS_DESCRIPTOR + bytes.fromhex("c0c0c0")  # as patched
+
+
+def fake(delay: float = 0.0, descriptor: bool = True) -> R3PComms:
+    d = R3PComms()
+    d.h = (FakeHid if descriptor else OldFakeHid)(delay)
+    d.hid_path = b"fake"
+    return d
+
+
+def check() -> None:
+    layouts = report_map(RIVER3PLUS_DESCRIPTOR)
+    assert {rid: r.length for (rid, r) in layouts.items()} == LENGTHS
+    # the patch only closes the collections, report 7 gains its last bit
+    patched = parse_descriptor(RIVER3PLUS_DESCRIPTOR + bytes.fromhex("b1a3c0c0c0"))
+    assert len(patched[7].fields) == len(layouts[7].fields) + 1
+    assert {rid: r.length for (rid, r) in patched.items()} == LENGTHS
+    inputs = parse_descriptor(RIVER3PLUS_DESCRIPTOR, "input")
+    assert sorted(inputs) == [7, 8, 11, 12, 13, 20, 28]
+
+    for descriptor in (True, False):
+        with fake(descriptor=descriptor) as d:
+            result = d.hid_get()
+            assert d.h.lengths == [(rid, LENGTHS[rid]) for rid in d.hid_reports]
+        values = {k: v.value for (k, v) in result.items()}
+        assert values["Charge Level"] == 76
+        assert values["Battery Time Remaining"] == -1
+        assert values["Config Active Power"] == 1200
+        assert abs(values["Voltage"] - 12.0) < 1e-9
+        assert values["Delay Before Shutdown"] == -1
+        assert values["Flags"] == "0b0000111000000000"
+        assert values["AC Present"] is ac_live(result["Flags"].raw) is True
+        assert values["Discharging"] and not values["Charging"]
+    print(f"{len(layouts)} feature reports, every one read at its exact length")
+
+
+def timed(n: int, fun) -> float:
+    t = time.perf_counter()
+    for _ in range(n):
+        fun()
+    return (time.perf_counter() - t) / n
+
+
+async def one_by_one(a: AsyncR3PComms) -> None:
+    # how hid_get() read reports before: one executor job each
+    for rid in a.proto.hid_reports:
+        await a.read_raw_report(rid)
+
+
+async def async_rates(delay: float, n: int) -> tuple[float, float]:
+    a = AsyncR3PComms()
+    a.proto.h = FakeHid(delay)
+    a.proto.hid_path = b"fake"
+    async with a:
+        t = time.perf_counter()
+        for _ in range(n):
+            await one_by_one(a)
+        before = (time.perf_counter() - t) / n
+        t = time.perf_counter()
+        for _ in range(n):
+            await a.read_reports(list(a.proto.hid_reports))
+        batched = (time.perf_counter() - t) / n
+    return before, batched
+
+
+def main() -> None:
+    check()
+    t = timed(200, lambda: parse_descriptor(RIVER3PLUS_DESCRIPTOR))
+    cached = timed(20000, lambda: report_map(RIVER3PLUS_DESCRIPTOR))
+    print(f"parse: {t * 1e6:.0f} us, again (cached): {cached * 1e6:.2f} us")
+
+    d = fake()
+    payloads = [(rid, REPORTS[rid]) for rid in d.hid_reports]
+    t = timed(5000, lambda: d.decode_reports(payloads))
+    n = len(d.decode_reports(payloads))
+    print(f"decode_reports(): {t * 1e6:.1f} us for {n} fields")
+
+    for delay in (0.0, 0.0002):
+        before, batched = asyncio.run(async_rates(delay, 300))
+        print(
+            f"async, {delay * 1e6:3.0f} us per report: one job per report "
+            f"{before * 1e6:6.0f} us, batched {batched * 1e6:6.0f} us "
+            f"({before / batched:.2f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+# MQTTPublisher and run_mqtt() against a minimal asyncio MQTT broker: the
+# CONNECT, retained discovery messages, PUBLISHes, reconnecting after the
+# broker drops the connection, a bounded close() when it's gone, and no serial
+# number on the wire with --redact-serial. then the publish rate
+# run like: PYTHONPATH=src python wip/bench_mqtt.py
+import asyncio
+import json
+import struct
+import time
+
+from r3pcomms import Emulator
+from r3pcomms.__main__ import run_mqtt
+from r3pcomms._mqtt import HA_ENTITIES, MQTTPublisher, ha_discovery
+
+MESSAGES = 20000
+
+
+class Broker:
+    """
+    just enough of an MQTT 3.1.1 broker to take QoS 0 publishes, hanging up
+    on the client after drop_after of them (once) when set
+    """
+
+    def __init__(self, drop_after: int = 0) -> None:
+        self.drop_after = drop_after
+        self.connects = []
+        self.publishes = []
+        self.disconnects = 0
+        self.server = None
+
+    async def start(self) -> int:
+        self.server = await asyncio.start_server(self.handle, "127.0.0.1", 0)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        self.server.close()
+        await self.server.wait_closed()
+
+    @staticmethod
+    async def packet(reader: asyncio.StreamReader) -> tuple[int, bytes]:
+        first = (await reader.readexactly(1))[0]
+        length = shift = 0
+        while True:
+            digit = (await reader.readexactly(1))[0]
+            length |= (digit & 0x7F) << shift
+            shift += 7
+            if not digit & 0x80:
+                return first, await reader.readexactly(length)
+
+    async def handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            first, body = await self.packet(reader)
+            assert first == 0x10 and body[:6] == b"\x00\x04MQTT", body
+            (id_len,) = struct.unpack_from("!H", body, 10)
+            self.connects.append(body[12 : 12 + id_len].decode())
+            writer.write(b"\x20\x02\x00\x00")
+            while True:
+                first, body = await self.packet(reader)
+                if first >> 4 == 3:
+                    (topic_len,) = struct.unpack_from("!H", body)
+                    topic = body[2 : 2 + topic_len].decode()
+                    self.publishes.append((topic, body[2 + topic_len :], first & 1))
+                    if len(self.publishes) == self.drop_after:
+                        self.drop_after = 0
+                        break
+                elif first == 0xC0:
+                    writer.write(b"\xd0\x00")
+                elif first == 0xE0:
+                    self.disconnects += 1
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+
+async def check_publisher() -> None:
+    broker = Broker(drop_after=len(HA_ENTITIES) + 3)
+    port = await broker.start()
+    async with MQTTPublisher("127.0.0.1", port, client_id="bench") as mqtt:
+        for topic, config in ha_discovery("unit", "r3pcomms/unit"):
+            await mqtt.publish(topic, config, retain=True)
+        for i in range(10):
+            await mqtt.publish("r3pcomms/unit", json.dumps({"i": i}))
+            await asyncio.sleep(0.2)
+    await asyncio.sleep(0.1)
+    await broker.stop()
+    assert broker.connects == ["bench", "bench"], broker.connects
+    assert broker.disconnects == 1, broker.disconnects
+    discovery = broker.publishes[: len(HA_ENTITIES)]
+    assert all(t.startswith("homeassistant/") and r for (t, _, r) in discovery)
+    assert all(
+        json.loads(p)["state_topic"] == "r3pcomms/unit" for (_, p, _) in discovery
+    )
+    states = [json.loads(p)["i"] for (t, p, r) in broker.publishes[len(HA_ENTITIES) :]]
+    # the broker hung up after state 2, states sent during the reconnect
+    # backoff waited in the queue
+    assert states[:3] == [0, 1, 2] and states[-1] == 9, states
+
+    # nobody listening: close() gives up after drain_timeout
+    mqtt = MQTTPublisher("127.0.0.1", port, drain_timeout=0.5)
+    async with mqtt:
+        await mqtt.publish("r3pcomms/unit", "lost")
+        t = time.monotonic()
+    assert time.monotonic() - t < 1.0 and mqtt.queue.empty()
+    print("connect, discovery, publish, reconnect and close check out")
+
+
+async def check_redaction(port: int, node_id: str | None) -> list:
+    broker = Broker()
+    broker_port = await broker.start()
+    mqtt_args = {
+        "com": port,
+        "usb": "",
+        "dbg": 0,
+        "hide_sn": True,
+        "p": 0.0,
+        "n": 2,
+        "overlap": False,
+        "inf": False,
+        "broker": f"mqtt://127.0.0.1:{broker_port}",
+        "topic": "r3pcomms/{serial}",
+        "per_field": True,
+        "ha_discovery": True,
+        "queue_size": 100,
+        "node_id": node_id,
+    }
+    await run_mqtt(**mqtt_args)
+    await broker.stop()
+    return broker.publishes
+
+
+def check() -> None:
+    asyncio.run(check_publisher())
+    with Emulator() as e:
+        serial = e.serial_number
+        for node_id in (None, "garage"):
+            publishes = asyncio.run(check_redaction(e.port, node_id))
+            assert publishes
+            for topic, payload, _ in publishes:
+                assert serial not in topic.encode() and serial not in payload
+            expected = f"r3pcomms/{node_id or 'redacted'}/total_load"
+            assert expected in {t for (t, _, _) in publishes}, publishes
+    print("no serial number in any topic or payload with --redact-serial")
+
+
+async def rate() -> float:
+    broker = Broker()
+    port = await broker.start()
+    payload = json.dumps({"Total Load": {"value": 258.77, "unit": "W"}})
+    t = time.perf_counter()
+    async with MQTTPublisher("127.0.0.1", port, queue_size=1000) as mqtt:
+        for _ in range(MESSAGES):
+            await mqtt.publish("r3pcomms/unit", payload)
+    dt = time.perf_counter() - t
+    await broker.stop()
+    assert len(broker.publishes) == MESSAGES
+    return MESSAGES / dt
+
+
+def main() -> None:
+    check()
+    print(f"publish(): {asyncio.run(rate()):.0f} messages/s over one connection")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# how per-sample latency scales with the number of units polled by poll_many()
+# each simulated unit is an Emulator answering queries after a fixed delay.
+# also checks that a unit answering after its timeout neither holds up the
+# others nor has its late replies taken for the answers to later polls, and
+# that repeated --hid specs each get a unit of their own
+# run like: PYTHONPATH=src python wip/bench_multi.py
+import asyncio
+import contextlib
+import time
+
+from r3pcomms import AsyncR3PComms, Emulator, R3PComms
+from r3pcomms._multi import claim, poll_many
+
+REPLY_DELAY_S = 0.02
+ROUNDS = 20
+
+
+async def check() -> None:
+    with Emulator() as ok, Emulator(latency=0.3) as late:
+        devs = {
+            "ok": AsyncR3PComms(ok.port),
+            "late": AsyncR3PComms(late.port, timeout=0.2),
+        }
+        polls = {"ok": [], "late": []}
+        async for name, result in poll_many(devs, 0.25, 4):
+            if isinstance(result, Exception):
+                polls[name].append(None)
+                # reply 0 is still on its way, everything after comes in time
+                late.latency = 0.0
+            else:
+                pre = bytes.fromhex(result["preamble?"].data)
+                polls[name].append(R3PComms.get_sequencenum(pre))
+    # poll N queries with sequence number N, and has to get that reply back
+    assert polls == {"ok": [0, 1, 2, 3], "late": [None, 1, 2, 3]}, polls
+    print("a late unit costs only its own polls, its late replies are dropped")
+
+
+def check_claim() -> None:
+    attached = [b"/dev/hidraw1", b"/dev/hidraw4", b"/dev/hidraw7"]
+    find = R3PComms.find_hid_devices
+    R3PComms.find_hid_devices = staticmethod(lambda pid, vid, backend: attached)
+    try:
+        hids = claim(["3746:ffff", "/dev/hidraw1", "3746:ffff"])
+        assert hids == ["/dev/hidraw4", "/dev/hidraw1", "/dev/hidraw7"], hids
+        try:
+            claim(["3746:ffff"] * 4)
+            raise AssertionError("four units out of three should be refused")
+        except ValueError:
+            pass
+    finally:
+        R3PComms.find_hid_devices = find
+    print("every --hid VENDOR_ID:PRODUCT_ID gets a hidraw node of its own")
+
+
+async def bench(n_units: int) -> float:
+    with contextlib.ExitStack() as units:
+        return await bench_units(
+            [units.enter_context(Emulator(REPLY_DELAY_S)).port for _ in range(n_units)]
+        )
+
+
+async def bench_units(ports: list[str]) -> float:
+    devs = {f"unit{i}": AsyncR3PComms(port) for (i, port) in enumerate(ports)}
+    t0 = time.perf_counter()
+    samples = 0
+    async for name, result in poll_many(devs, 0, ROUNDS):
+        assert not isinstance(result, Exception), result
+        samples += 1
+    assert samples == len(ports) * ROUNDS
+    return (time.perf_counter() - t0) / ROUNDS
+
+
+check_claim()
+asyncio.run(check())
+print(f"simulated reply delay {REPLY_DELAY_S * 1e3:.0f} ms, {ROUNDS} rounds each")
+for n_units in (1, 2, 4, 8, 16, 32):
+    t = asyncio.run(bench(n_units))
+    sequential = n_units * REPLY_DELAY_S
+    print(
+        f"{n_units:3d} units: {t * 1e3:6.1f} ms per round "
+        f"(one at a time would be >= {sequential * 1e3:6.1f} ms)"
+    )
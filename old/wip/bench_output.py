@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# cost and size per sample of each --format, against the original
+# print(json.dumps(...), flush=True) per sample. no hardware needed
+# run like: PYTHONPATH=src python wip/bench_output.py
+import contextlib
+import csv
+import io
+import json
+import os
+import time
+
+from r3pcomms import Emulator, R3PComms, Sample, read_binary
+from r3pcomms._output import ENCODERS
+
+SAMPLES = 5000
+
+
+def results() -> list[dict]:
+    """
+    SAMPLES annotated metrics results from Emulator replies
+    """
+    d = R3PComms()
+    reply = Emulator().reply
+    ret = []
+    for i in range(SAMPLES):
+        result = d.decode_metrics(reply(d.frame(d.metrics_msg))[:-2])
+        t = 1.7e9 + i
+        info = {
+            "Run Time": Sample("i3", float(i), float(i), "s"),
+            "Delta Time": Sample("i2", 1.0, 1.0, "s"),
+            "Unix Time": Sample("i1", t, t, "s"),
+            "Version": Sample("i0", "1.0", "1.0", ""),
+        }
+        ret.append(info | result)
+    return ret
+
+
+def check(samples: list[dict]) -> None:
+    # every format must give back the values that went in
+    want = [{k: s.value for (k, s) in r.items()} for r in samples[:50]]
+
+    out = io.BytesIO()
+    with ENCODERS["json"](out) as enc:
+        for r in samples[:50]:
+            enc.write(r)
+    lines = out.getvalue().decode().splitlines()
+    assert lines[0] == json.dumps(samples[0], default=Sample.as_dict)
+    assert [{k: v["value"] for (k, v) in json.loads(x).items()} for x in lines] == [
+        {k: list(v) if isinstance(v, tuple) else v for (k, v) in w.items()}
+        for w in want
+    ]
+
+    out = io.BytesIO()
+    with ENCODERS["ndjson"](out, 16) as enc:
+        for r in samples[:50]:
+            enc.write(r)
+    lines = out.getvalue().decode().splitlines()
+    names = [f[0] for f in json.loads(lines[0])["schema"]]
+    assert len(lines) == 51
+    for line, w in zip(lines[1:], want):
+        got = dict(zip(names, json.loads(line)))
+        assert got == {
+            k: list(v) if isinstance(v, tuple) else v for (k, v) in w.items()
+        }
+
+    out = io.BytesIO()
+    with ENCODERS["csv"](out, 16) as enc:
+        for r in samples[:50]:
+            enc.write(r)
+    rows = list(csv.reader(io.StringIO(out.getvalue().decode())))
+    assert len(rows) == 51 and "Temperatures[3]" in rows[0]
+    assert rows[1][rows[0].index("Total Load")] == repr(want[0]["Total Load"])
+
+    out = io.BytesIO()
+    with ENCODERS["binary"](out, 16) as enc:
+        for r in samples[:50]:
+            enc.write(r)
+    out.seek(0)
+    assert list(read_binary(out)) == want
+
+    # a field that starts out bool and turns int, and back, gets a new schema
+    # each time rather than its ints squashed to True
+    flips = [True, 5, 0, False, 7]
+    out = io.BytesIO()
+    with ENCODERS["binary"](out) as enc:
+        for x in flips:
+            enc.write({"Flag": Sample("d0", x, x, "")})
+    out.seek(0)
+    got = [r["Flag"] for r in read_binary(out)]
+    assert got == flips and [type(x) for x in got] == [type(x) for x in flips], got
+    print("json, ndjson, csv and binary all round trip")
+
+
+def main() -> None:
+    samples = results()
+    check(samples)
+
+    with open(os.devnull, "w") as null, contextlib.redirect_stdout(null):
+        t = time.perf_counter()
+        for r in samples:
+            print(json.dumps(r, default=Sample.as_dict), flush=True)
+        base = (time.perf_counter() - t) / SAMPLES
+    size = len(json.dumps(samples[0], default=Sample.as_dict)) + 1
+    print(f"{'print(json.dumps())':<22}{base * 1e6:8.1f} us{size:8} B/sample")
+
+    for fmt in ENCODERS:
+        for flush_every in (1, 64):
+            with open(os.devnull, "wb") as null:
+                out = ENCODERS[fmt](null, flush_every)
+                t = time.perf_counter()
+                for r in samples:
+                    out.write(r)
+                out.close()
+                per = (time.perf_counter() - t) / SAMPLES
+            sink = io.BytesIO()
+            with ENCODERS[fmt](sink, SAMPLES) as out:
+                for r in samples:
+                    out.write(r)
+            size = len(sink.getvalue()) / SAMPLES
+            print(
+                f"{fmt + ' every ' + str(flush_every):<22}{per * 1e6:8.1f} us"
+                f"{size:8.0f} B/sample  {base / per:4.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# metrics queries per second with 1, 2 and 4 requests in flight, against the
+# pty Emulator at a few reply latencies. also checks that late replies to
+# timed out requests are not taken for the next reply, and that replies
+# nobody collects don't pile up
+# run like: PYTHONPATH=src python wip/bench_pipeline.py
+import time
+
+from r3pcomms import Emulator, R3PComms
+
+QUERIES = 400
+
+
+def check() -> None:
+    with Emulator(latency=0.15) as e, R3PComms(e.port) as d:
+        d.s.timeout = 0.1
+        try:
+            d.query(d.metrics_msg)
+            raise AssertionError("the first query should have timed out")
+        except ValueError:
+            pass
+        e.latency = 0.0
+        # the late reply to sequence number 0 arrives first and is dropped
+        reply = d.query(d.metrics_msg)
+        assert R3PComms.get_sequencenum(reply) == 1
+        assert not d.pending and not d.replies
+
+        # replies are routed to whichever request they answer
+        d.depth = 4
+        replies = d.query_many([d.serial_msg, d.metrics_msg, d.serial_msg])
+        assert [R3PComms.get_sequencenum(r) for r in replies] == [2, 3, 4]
+        assert len(replies[0]) == len(replies[2]) < len(replies[1])
+
+        # a metrics() generator given up on leaves replies nobody collects,
+        # they go once they're a timeout old
+        metrics = d.metrics()
+        next(metrics)
+        del metrics
+        time.sleep(0.05)
+        d.query(d.serial_msg)
+        assert len(d.replies) == 3, d.replies
+        time.sleep(0.15)
+        d.query(d.serial_msg)
+        assert not d.pending and not d.replies and not d.lost
+    print("late replies are dropped and replies reach their own requests")
+
+
+def rate(latency: float, depth: int) -> tuple[float, dict]:
+    with Emulator(latency=latency) as e, R3PComms(e.port) as d:
+        d.depth = depth
+        t = time.perf_counter()
+        for result in d.metrics(QUERIES):
+            pass
+        return QUERIES / (time.perf_counter() - t), result
+
+
+def main() -> None:
+    check()
+    for latency in (0.0, 0.001, 0.005):
+        base, expected = rate(latency, 1)
+        line = f"latency {latency * 1e3:3.0f} ms: depth 1 {base:7.0f}/s"
+        for depth in (2, 4):
+            per_s, result = rate(latency, depth)
+            assert {k: v.value for (k, v) in result.items()} == {
+                k: v.value for (k, v) in expected.items()
+            }
+            line += f", depth {depth} {per_s:7.0f}/s ({per_s / base:.2f}x)"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
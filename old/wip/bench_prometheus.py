@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# Exporter against the pty Emulator: scrapes only ever get the cached response
+# and never cause USB traffic, a poll failing with an OSError (as
+# serial.SerialException is) takes r3p_up to 0 without stopping the polling.
+# then the scrape rate
+# run like: PYTHONPATH=src python wip/bench_prometheus.py
+import asyncio
+import time
+
+from r3pcomms import AsyncR3PComms, Emulator
+from r3pcomms._prometheus import Exporter
+
+SCRAPES = 500
+
+
+async def scrape(port: int) -> bytes:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(b"GET /metrics HTTP/1.1\r\nHost: bench\r\n\r\n")
+    response = await reader.read()
+    writer.close()
+    return response
+
+
+async def check() -> float:
+    with Emulator() as e:
+        async with AsyncR3PComms(e.port) as d:
+            exporter = Exporter(d, period=0.05)
+            server = await asyncio.start_server(exporter.handle, "127.0.0.1", 0)
+            port = server.sockets[0].getsockname()[1]
+            async with server:
+                await exporter.poll(2)
+                requests = e.requests
+                t = time.perf_counter()
+                for _ in range(SCRAPES):
+                    response = await scrape(port)
+                dt = (time.perf_counter() - t) / SCRAPES
+                assert e.requests == requests, (e.requests, requests)
+                assert exporter.scrapes == SCRAPES and exporter.polls == 2
+                assert b"\nr3p_up 1\n" in response and b"r3p_load_watts" in response
+
+                async def unplugged(overlap: bool = False) -> dict:
+                    raise OSError(5, "Input/output error")
+
+                d.get = unplugged
+                await exporter.poll(3)
+                response = await scrape(port)
+                assert exporter.errors == 3 and exporter.polls == 2
+                assert b"\nr3p_up 0\n" in response, response
+                assert b"\nr3p_poll_errors_total 3\n" in response, response
+    print(
+        f"{SCRAPES} scrapes cost no queries, a failing unit shows as r3p_up 0 "
+        "and is polled on"
+    )
+    return dt
+
+
+def main() -> None:
+    dt = asyncio.run(check())
+    print(f"scrape: {dt * 1e6:.0f} us each, connection included")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# serial protocol round trips against the pty Emulator, no hardware needed:
+# query() latency percentiles, the highest sustainable ser_get() rate, and
+# how polling holds up when replies lose bytes or fail their CRC. also checks
+# the framer doesn't wait on false preambles claiming long frames
+# run like: PYTHONPATH=src python wip/bench_protocol.py
+import statistics
+import time
+
+from r3pcomms import Emulator, Framer, R3PComms
+
+QUERIES = 2000
+RATE_SECONDS = 2.0
+
+
+def percentiles(samples: list[float]) -> str:
+    q = statistics.quantiles(samples, n=100)
+    return (
+        f"p50 {q[49] * 1e6:7.0f} us  p90 {q[89] * 1e6:7.0f} us  "
+        f"p99 {q[98] * 1e6:7.0f} us  max {max(samples) * 1e6:7.0f} us"
+    )
+
+
+def round_trips(d: R3PComms, msg: str) -> list[float]:
+    ret = []
+    for _ in range(QUERIES):
+        t0 = time.perf_counter()
+        d.query(msg)
+        ret.append(time.perf_counter() - t0)
+    return ret
+
+
+def max_rate(d: R3PComms) -> float:
+    n = 0
+    t0 = time.perf_counter()
+    while (dt := time.perf_counter() - t0) < RATE_SECONDS:
+        d.ser_get()
+        n += 1
+    return n / dt
+
+
+def check() -> None:
+    d = R3PComms()
+    reply = Emulator().reply(d.frame(d.metrics_msg))
+    for junk in (
+        b"\xaa\x03\x20\x03" + bytes(40),  # claims an 820 byte frame
+        b"\xaa\x03\xff\xff",  # claims more than any frame can be
+        reply[:-30],  # a reply that lost its tail
+    ):
+        framer = Framer()
+        framer.feed(junk + reply)
+        frames = [bytes(f) for f in framer.frames()]
+        assert frames == [reply], junk
+        assert framer.stats()["dropped_bytes"] == len(junk), framer.stats()
+        assert not len(framer)
+    # a frame still on its way is waited for
+    framer = Framer()
+    framer.feed(reply[:100])
+    assert not list(framer.frames())
+    framer.feed(reply[100:])
+    assert [bytes(f) for f in framer.frames()] == [reply]
+    print("false and truncated frames don't hold up the next one")
+
+
+def faults(rate: float) -> str:
+    with Emulator(drop_rate=rate, corrupt_rate=rate, seed=1) as unit:
+        with R3PComms(unit.port) as d:
+            d.s.timeout = 0.05
+            ok = 0
+            for _ in range(200):
+                try:
+                    d.ser_get()
+                    ok += 1
+                except ValueError:
+                    pass
+            stats = d.framer.stats()
+    return (
+        f"{rate:4.0%} dropped + {rate:4.0%} bad CRC: {ok}/200 polls ok, "
+        f"{stats['crc_errors']} CRC errors, {stats['dropped_bytes']} bytes skipped"
+    )
+
+
+def main() -> None:
+    check()
+    for latency in (0.0, 0.002):
+        with Emulator(latency) as unit, R3PComms(unit.port) as d:
+            print(f"emulated reply latency {latency * 1e3:.0f} ms")
+            print(f"  metrics query: {percentiles(round_trips(d, d.metrics_msg))}")
+            print(f"  serial query:  {percentiles(round_trips(d, d.serial_msg))}")
+            print(f"  max ser_get() rate: {max_rate(d):,.0f}/s")
+    for rate in (0.01, 0.05, 0.2):
+        print(faults(rate))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+# decode throughput of replay() over a synthetic recording, no hardware needed
+# every sample is one metrics query/reply plus the eight HID reports
+# run like: PYTHONPATH=src python wip/bench_replay.py
+import os
+import tempfile
+import time
+
+from r3pcomms import Emulator, R3PComms, Recorder, replay
+
+SAMPLES = 2000
+
+REPORTS = {
+    12: bytes.fromhex("0c4c"),
+    17: bytes.fromhex("11") + bytes(2),
+    13: bytes.fromhex("0d3317"),
+    11: bytes.fromhex("0b") + bytes(2),
+    18: bytes.fromhex("12") + bytes(2),
+    19: bytes.fromhex("13") + bytes(2),
+    1: bytes.fromhex("01") + bytes(2),
+    7: bytes.fromhex("07000400"),
+}
+
+
+def record(path: str) -> None:
+    d = R3PComms()
+    reply = Emulator().reply
+    with Recorder(path) as rec:
+        for _ in range(SAMPLES):
+            seq = d.sequence_num
+            request = d.frame(d.metrics_msg)
+            rec.tx(request, seq)
+            rec.rx(reply(request))
+            for rid in d.hid_reports:
+                rec.hid(rid, REPORTS[rid])
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.r3prec")
+        record(path)
+        size = os.path.getsize(path)
+
+        # the same bytes decoded directly must give the same results
+        d = R3PComms()
+        request = d.frame(d.metrics_msg)
+        expected = d.decode_metrics(Emulator().reply(request)[:-2]) | d.decode_reports(
+            REPORTS.items()
+        )
+        first = next(replay(path))
+        assert {k: v.value for k, v in first.items()} == {
+            k: v.value for k, v in expected.items()
+        }
+
+        t0 = time.perf_counter()
+        n = sum(1 for _ in replay(path))
+        dt = time.perf_counter() - t0
+        assert n == SAMPLES, n
+    print(f"{SAMPLES} samples, {size / SAMPLES:.0f} bytes each on disk")
+    print(f"replay: {SAMPLES / dt:,.0f} samples/s ({dt / SAMPLES * 1e6:.1f} us each)")
+
+
+if __name__ == "__main__":
+    main()
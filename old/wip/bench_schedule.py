@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# Scheduler's deadline handling against a fake clock, the asyncio ticks()
+# built on it following the missed tick policy, then the achieved period of
+# sleep-after-each-poll vs absolute deadlines on the real clock
+# run like: PYTHONPATH=src python wip/bench_schedule.py
+import asyncio
+import time
+
+from r3pcomms._async import ticks
+from r3pcomms._schedule import Scheduler
+from r3pcomms._timing import Timings
+
+
+class FakeClock:
+    """
+    a monotonic clock that only moves when slept on or told to
+    """
+
+    def __init__(self) -> None:
+        self.now = 100.0
+        self.sleeps = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        assert seconds > 0
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def fake(period: float, policy: str = "skip") -> tuple[Scheduler, FakeClock]:
+    clock = FakeClock()
+    return Scheduler(period, policy, clock, clock.sleep, Timings()), clock
+
+
+def check() -> None:
+    # work shorter than the period: ticks land exactly on the grid
+    sched, clock = fake(1.0)
+    starts = []
+    for _ in range(1000):
+        assert sched.wait() == len(starts)
+        starts.append(clock.now)
+        clock.now += 0.3
+    assert starts[-1] == 100.0 + 999 * 1.0, starts[-1]
+    assert sched.stats()["phases"]["lateness"]["max_us"] == 0
+
+    # one long stall under "skip": the missed ticks are dropped and the
+    # latest one due runs right away, then it's back on the grid
+    sched, clock = fake(1.0)
+    sched.wait()
+    clock.now += 3.5
+    assert sched.wait() == 3 and clock.now == 103.5
+    clock.now += 0.1
+    assert sched.wait() == 4 and clock.now == 104.0
+    assert sched.stats()["counters"] == {"ticks": 3, "skipped_ticks": 2}
+
+    # the same stall under "catchup": every tick runs, back to back
+    sched, clock = fake(1.0, "catchup")
+    sched.wait()
+    clock.now += 3.5
+    assert [sched.wait() for _ in range(3)] == [1, 2, 3] and clock.now == 103.5
+    assert sched.wait() == 4 and clock.now == 104.0
+    assert clock.sleeps == [0.5]
+
+    # a zero period never sleeps or skips
+    sched, clock = fake(0.0)
+    for i in range(10):
+        assert sched.wait() == i
+        clock.now += 0.01
+    assert not clock.sleeps
+
+    # without timings the same ticks, and nothing recorded
+    clock = FakeClock()
+    sched = Scheduler(1.0, "skip", clock, clock.sleep)
+    sched.wait()
+    clock.now += 3.5
+    assert sched.wait() == 3 and sched.stats() == {"phases": {}, "counters": {}}
+    print("Scheduler keeps the grid and follows both policies on a fake clock")
+
+
+async def late_tick(policy: str) -> tuple[list[int], dict]:
+    # tick 1 overruns into tick 3's slot, 0.18 s against ticks every 0.05 s
+    timings = Timings()
+    seen = []
+    async for n in ticks(0.05, 5, policy, timings):
+        seen.append(n)
+        if n == 1:
+            time.sleep(0.13)
+    return seen, timings.stats()["counters"]
+
+
+def check_async() -> None:
+    seen, counters = asyncio.run(late_tick("skip"))
+    assert seen == [0, 1, 3, 4, 5], seen
+    assert counters == {"ticks": 5, "skipped_ticks": 1}, counters
+    seen, counters = asyncio.run(late_tick("catchup"))
+    assert seen == [0, 1, 2, 3, 4], seen
+    assert counters == {"ticks": 5}, counters
+    print("ticks() skips or catches up on a late tick as told")
+
+
+def real(period: float, work: float, ticks: int) -> None:
+    t = time.monotonic()
+    for i in range(ticks):
+        if i:
+            time.sleep(period)
+        time.sleep(work)
+    sleep_after = (time.monotonic() - t) / (ticks - 1)
+
+    sched = Scheduler(period, timings=Timings())
+    for _ in range(ticks):
+        sched.wait()
+        time.sleep(work)
+    s = sched.stats()["phases"]
+    print(
+        f"every {period * 1e3:.0f} ms with {work * 1e3:.0f} ms of work: "
+        f"sleep after each poll {sleep_after * 1e3:.2f} ms/period, "
+        f"deadlines {s['period']['mean_us'] / 1e3:.2f} ms/period, "
+        f"lateness p50 {s['lateness']['p50_us']:.0f} us "
+        f"p99 {s['lateness']['p99_us']:.0f} us"
+    )
+
+
+def main() -> None:
+    check()
+    check_async()
+    real(0.05, 0.015, 60)
+    real(0.02, 0.005, 150)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# compares R3PComms.serial_segmenter's decoder registry against the old if/elif chain
+# run like: PYTHONPATH=src python wip/bench_segments.py
+import struct
+import timeit
+
+from r3pcomms import R3PComms, SegmentDecoder, as_dicts, register_segment
+
+
+def legacy_segmenter(source: bytes) -> dict:
+    offset = 0
+    ssize = len(source)
+    result = {}
+    while offset < ssize:
+        seg_type, seg_len = struct.unpack_from("<HB", source, offset=offset)
+        seg_data = source[offset + 3 : offset + 3 + seg_len]
+        offset += 3 + seg_len
+        if seg_type == 3:
+            name, seg_val, unit = (
+                "Design Charge Capacity",
+                struct.unpack("<I", seg_data)[0],
+                "mAh",
+            )
+        elif seg_type == 4:
+            name, seg_val, unit = (
+                "Temperatures",
+                struct.unpack("<BBBB", seg_data),
+                "degC",
+            )
+        elif seg_type == 7:
+            name, seg_val, unit = "Total Load", struct.unpack("f", seg_data)[0], "W"
+        elif seg_type == 8:
+            name, seg_val, unit = "Total Draw", struct.unpack("f", seg_data)[0], "W"
+        elif seg_type == 9:
+            name, seg_val, unit = "AC Draw", struct.unpack("f", seg_data)[0], "W"
+        elif seg_type == 12:
+            name, seg_val, unit = "Solar/DC Draw", struct.unpack("f", seg_data)[0], "W"
+        elif seg_type == 13:
+            name, seg_val, unit = (
+                "Line Frequency?",
+                struct.unpack("<L", seg_data)[0] / 10,
+                "Hz",
+            )
+        elif seg_type == 14:
+            name, seg_val, unit = "AC Load", struct.unpack("f", seg_data)[0] * -1, "W"
+        elif seg_type == 15:
+            name, seg_val, unit = (
+                "AC Load Frequency?",
+                struct.unpack("<HH", seg_data),
+                "Hz",
+            )
+        elif seg_type == 16:
+            name, seg_val, unit = "DC Load", struct.unpack("f", seg_data)[0] * -1, "W"
+        elif seg_type == 17:
+            name, seg_val, unit = (
+                "USB-A Load",
+                struct.unpack("f", seg_data)[0] * -1,
+                "W",
+            )
+        elif seg_type == 18:
+            name, seg_val, unit = (
+                "USB-C Load",
+                struct.unpack("f", seg_data)[0] * -1,
+                "W",
+            )
+        elif seg_type == 22:
+            name, seg_val, unit = "Serial Num", "REDACTED", ""
+            seg_data = bytes.fromhex("ff") * seg_len
+        elif seg_type == 23:
+            name, unit = "Remaining Charge Time", "min"
+            unpacked = struct.unpack("<HH", seg_data)
+            seg_val = -1 if seg_data[:2] == bytes.fromhex("3317") else unpacked
+        elif seg_type == 25:
+            name, seg_val, unit = "Model/Mfg. Batch/Date?", seg_data.hex(), "?"
+        else:
+            name, seg_val, unit = "unknown-s", struct.unpack("<HH", seg_data), "?"
+        i = 0
+        last_name = name
+        while name in result:
+            name = f"{last_name}{i}"
+            i += 1
+        result[name] = {
+            "type": f"s{seg_type}",
+            "data": "0x" + seg_data.hex(),
+            "value": seg_val,
+            "unit": unit,
+        }
+    return result
+
+
+# deobfuscated metrics reply segments from the README
+segments = bytes.fromhex(
+    "0200040000000003000400320000040004"
+    "1a1c19190500040000000006000400000000070004546281430800"
+    "04b7a1e941090004000000000a0004000000000b0004000000000c0004b7a1e9410d0004580200000e00"
+    "04546281c30f00043c000000100004000000001100040000000012000400000000130004000000001400"
+    "040000000015000400000000160010ffffffffffffffffffffffffffffffff1700043317000018000400"
+    "00000019000423010002"
+)
+
+d = R3PComms()
+assert as_dicts(d.serial_segmenter(segments)) == legacy_segmenter(segments)
+print("registry output matches the if/elif chain")
+
+n = 5000
+t_old = timeit.timeit(lambda: legacy_segmenter(segments), number=n) / n
+t_new = timeit.timeit(lambda: d.serial_segmenter(segments), number=n) / n
+print(f"if/elif chain: {t_old * 1e6:.1f} us/frame ({1 / t_old:,.0f} frames/s)")
+print(f"registry:      {t_new * 1e6:.1f} us/frame ({1 / t_new:,.0f} frames/s)")
+print(f"speedup: {t_old / t_new:.2f}x")
+
+register_segment(2, SegmentDecoder("Mystery Power", "W", "<f", lambda v: v[0]))
+assert d.serial_segmenter(segments)["Mystery Power"]["value"] == 0.0
+print("user registered decoder for s2 works")
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# CLI startup time, lazy vs everything imported up front, and the cost of a
+# cached device lookup vs enumerating the bus. no hardware needed
+# run like: PYTHONPATH=src python wip/bench_startup.py
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+RUNS = 15
+HEAVY = ("asyncio", "serial", "hid", "concurrent.futures", "urllib.request")
+
+
+def median_ms(args: list[str]) -> float:
+    times = []
+    for _ in range(RUNS):
+        t = time.perf_counter()
+        subprocess.run(args, check=True, stdout=subprocess.DEVNULL)
+        times.append(time.perf_counter() - t)
+    return statistics.median(times) * 1e3
+
+
+def loaded(code: str) -> list[str]:
+    """
+    which of HEAVY are imported after running code in a fresh interpreter
+    """
+    check = (
+        f"{code}\nimport sys\nprint(' '.join(m for m in {HEAVY!r} if m in sys.modules))"
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", check], check=True, capture_output=True, text=True
+    )
+    return out.stdout.split()
+
+
+def main() -> None:
+    lazy = loaded("import r3pcomms")
+    assert not lazy, f"import r3pcomms loads {lazy}"
+    parse = "from r3pcomms.__main__ import main_parser\nmain_parser().parse_args([])"
+    lazy = loaded(parse)
+    assert not lazy, f"parsing the command line loads {lazy}"
+    print("import r3pcomms and argument parsing load none of " + ", ".join(HEAVY))
+
+    py = median_ms([sys.executable, "-c", "pass"])
+    version = median_ms([sys.executable, "-m", "r3pcomms", "--version"])
+    eager = median_ms(
+        [
+            sys.executable,
+            "-c",
+            # what the package used to import on startup
+            "import serial, hid, asyncio, concurrent.futures\nimport r3pcomms\n"
+            "[getattr(r3pcomms, n) for n in r3pcomms.__all__]",
+        ]
+    )
+    print(f"python -c pass:             {py:6.1f} ms")
+    print(f"python -m r3pcomms --version: {version:6.1f} ms")
+    print(f"everything up front:        {eager:6.1f} ms")
+
+    from r3pcomms._devcache import DeviceCache
+    from r3pcomms._r3pcomms import R3PComms
+
+    n = 200
+    t = time.perf_counter()
+    for _ in range(n):
+        R3PComms.find_hid_devices(0xFFFF, 0x3746, "auto")
+    scan = (time.perf_counter() - t) / n
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = DeviceCache(os.path.join(tmp, "devices"))
+        cache.put("hid:3746:ffff", "/dev/null")
+        t = time.perf_counter()
+        for _ in range(n):
+            # a fresh cache per lookup, like a fresh CLI run
+            assert DeviceCache(cache.path).get("hid:3746:ffff") == "/dev/null"
+        hit = (time.perf_counter() - t) / n
+    print(f"HID enumeration:            {scan * 1e3:6.3f} ms")
+    print(f"device cache hit:           {hit * 1e3:6.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# a day of per-second samples: Store range query vs scanning the NDJSON log
+# run like: PYTHONPATH=src python wip/bench_store.py
+import json
+import os
+import tempfile
+import time
+
+from r3pcomms import Sample, Store
+
+SAMPLES = 86400
+FIELDS = ("Total Load", "Total Draw", "AC Draw", "AC Load", "DC Load", "USB-C Load")
+
+
+def result(i: int) -> dict:
+    t = 1.7e9 + i
+    ret = {"Unix Time": Sample("i1", t, t, "s")}
+    for j, name in enumerate(FIELDS):
+        value = float((i * (j + 1)) % 500)
+        ret[name] = Sample(f"s{j}", b"", value, "W")
+    ret["Temperatures"] = Sample("s3", b"", [26, 28, 25, 25], "°C")
+    return ret
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        log = os.path.join(tmp, "log.ndjson")
+        t0 = time.perf_counter()
+        with Store(os.path.join(tmp, "store"), capacity=SAMPLES) as st, open(
+            log, "w"
+        ) as f:
+            for i in range(SAMPLES):
+                r = result(i)
+                st.append(r)
+                f.write(json.dumps(r, default=Sample.as_dict) + "\n")
+        print(
+            f"writing both: {(time.perf_counter() - t0) / SAMPLES * 1e6:.1f} us/sample"
+        )
+
+        # the last hour of AC Load
+        start = 1.7e9 + SAMPLES - 3600
+        t0 = time.perf_counter()
+        with open(log) as f:
+            expected = []
+            for line in f:
+                rec = json.loads(line)
+                if rec["Unix Time"]["value"] >= start:
+                    expected.append(rec["AC Load"]["value"])
+        t_scan = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        with Store(os.path.join(tmp, "store"), writable=False) as st:
+            got = st.query("AC Load", start, columns=["value"])["value"]
+            hourly = st.query("AC Load", resolution=3600)
+        t_query = time.perf_counter() - t0
+        assert got == expected, (len(got), len(expected))
+        assert len(hourly["mean"]) == 24 + 1, len(hourly["mean"])
+
+    print(f"NDJSON scan: {t_scan * 1e3:.1f} ms, Store query: {t_query * 1e3:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# what one low battery check costs: the old ups-poweroff.sh loop (a fresh
+# `python -m r3pcomms --hid | jq` per check) vs Watchdog on an open device,
+# in wall time and CPU, and the reaction time each gets at its check period.
+# HID is faked (see bench_hidreport.py), so real checks also pay for the USB
+# transfers, eight reports per old check vs two per Watchdog check
+# run like: PYTHONPATH=src python wip/bench_watchdog.py
+import os
+import resource
+import shlex
+import subprocess
+import sys
+import time
+
+from bench_hidreport import FakeHid
+
+from r3pcomms import R3PComms
+from r3pcomms._watchdog import Watchdog
+
+RUNS = 10
+CHECKS = 5000
+OLD_PERIOD = 60.0  # ups-poweroff.sh's sleep between checks
+EVERY, FAST_EVERY = 60.0, 5.0  # Watchdog's defaults, on AC and on battery
+
+# python -m r3pcomms --hid, with the fake device patched in
+OLD_CHECK = f"""
+import sys
+sys.path.insert(0, {os.path.dirname(os.path.abspath(__file__))!r})
+from bench_hidreport import FakeHid
+from r3pcomms import R3PComms
+R3PComms.find_hid_device = lambda self, pid, vid: b"fake"
+R3PComms.new_hid_device = lambda self: FakeHid()
+from r3pcomms.__main__ import main
+main(["--hid"], "r3pcomms")
+"""
+
+
+def children_cpu() -> float:
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+def old_check() -> tuple[float, float]:
+    # wall and CPU seconds per check, the way ups-poweroff.sh did it
+    python = f"{shlex.quote(sys.executable)} -c {shlex.quote(OLD_CHECK)}"
+    cmd = f'{python} | jq \'.["Charge Level"]["value"]\''
+    cpu = children_cpu()
+    t = time.perf_counter()
+    for _ in range(RUNS):
+        out = subprocess.run(cmd, shell=True, capture_output=True, check=True)
+        assert out.stdout.strip() == b"76", out
+    return (time.perf_counter() - t) / RUNS, (children_cpu() - cpu) / RUNS
+
+
+def watchdog_check() -> tuple[float, float]:
+    d = R3PComms()
+    d.h = FakeHid()
+    d.hid_path = b"fake"
+    fired = []
+    with d:
+        dog = Watchdog(d, 80, action=lambda level, ac: fired.append(level))
+        cpu = time.process_time()
+        t = time.perf_counter()
+        for _ in range(CHECKS):
+            dog.check()
+        wall = (time.perf_counter() - t) / CHECKS
+        cpu = (time.process_time() - cpu) / CHECKS
+    # 76% <= 80% fires once, and not again until back up to 85%
+    assert fired == [76] and dog.level == 76 and dog.ac
+    assert d.h.lengths[:2] == [(12, 2), (7, 3)]
+    return wall, cpu
+
+
+def main() -> None:
+    old_wall, old_cpu = old_check()
+    new_wall, new_cpu = watchdog_check()
+    print(
+        f"per check: shell loop {old_wall * 1e3:.1f} ms wall, "
+        f"{old_cpu * 1e3:.1f} ms CPU; Watchdog {new_wall * 1e6:.1f} us wall, "
+        f"{new_cpu * 1e6:.1f} us CPU ({old_cpu / new_cpu:.0f}x less CPU)"
+    )
+    # the charge level only drops on battery, where Watchdog checks every
+    # FAST_EVERY. the shell loop's period is a sleep after each check
+    for name, period, wall, cpu in (
+        ("shell loop", OLD_PERIOD + old_wall, old_wall, old_cpu),
+        ("Watchdog, on AC", EVERY, new_wall, new_cpu),
+        ("Watchdog, on battery", FAST_EVERY, new_wall, new_cpu),
+    ):
+        print(
+            f"{name:>20}: reacts within {period + wall:5.1f} s "
+            f"(mean {period / 2 + wall:5.1f} s), "
+            f"{cpu / period * 86400 * 1e3:8.1f} ms CPU per day"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+# de-obfuscation throughput: the old per-byte list comprehension vs translate tables
+# run like: PYTHONPATH=src python wip/bench_xorit.py
+import os
+import timeit
+from operator import xor
+
+from r3pcomms import R3PComms
+
+
+def legacy_xorit(data: bytes) -> bytes:
+    not_obfuscated = data[:18]
+    sequence_num = R3PComms.get_sequencenum(not_obfuscated)
+    deobfuscated = bytes([xor(x, sequence_num) & 0xFF for x in data[18:]])
+    return not_obfuscated + deobfuscated
+
+
+print(f"{'bytes':>9} {'per-byte':>12} {'xorit':>12} {'speedup':>8}")
+for size in (100, 204, 1_000, 10_000, 100_000, 1_000_000, 10_000_000):
+    frame = os.urandom(size)
+    assert legacy_xorit(frame) == R3PComms.xorit(frame)
+    n = max(1, 2_000_000 // size)
+    t_old = timeit.timeit(lambda: legacy_xorit(frame), number=max(1, n // 10)) / max(
+        1, n // 10
+    )
+    t_new = timeit.timeit(lambda: R3PComms.xorit(frame), number=n) / n
+    print(
+        f"{size:9d} {size / t_old / 1e6:9.1f} MB/s {size / t_new / 1e6:9.1f} MB/s "
+        f"{t_old / t_new:7.0f}x"
+    )